@@ -0,0 +1,140 @@
+import copy
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from foodgram_backend import metrics
+
+
+CACHE_KEY = 'auth-token:{}'
+
+REVISION_KEY = 'auth-token-revision:{}'
+
+
+def _digest(key):
+    # В кеше хранится хеш токена, а не сам токен.
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class TokenCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, digest):
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[digest]
+                return None
+            self.entries.move_to_end(digest)
+            return entry[1]
+
+    def set(self, digest, value):
+        with self.lock:
+            self.entries[digest] = (
+                time.monotonic() + settings.AUTH_TOKEN_CACHE_TTL, value
+            )
+            self.entries.move_to_end(digest)
+            while len(self.entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def discard(self, digest):
+        with self.lock:
+            self.entries.pop(digest, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def _revision(digest):
+    return cache.get(REVISION_KEY.format(digest))
+
+
+def invalidate_token(key):
+    digest = _digest(key)
+    token_cache.discard(digest)
+    if settings.AUTH_TOKEN_SHARED_CACHE:
+        # Без ревизии локальные копии токена в других воркерах
+        # перестают считаться действительными.
+        cache.delete_many([
+            CACHE_KEY.format(digest), REVISION_KEY.format(digest)
+        ])
+
+
+def invalidate_user_tokens(user_id):
+    for key in Token.objects.filter(user_id=user_id).values_list(
+        'key', flat=True
+    ):
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def _local(self, digest):
+        entry = token_cache.get(digest)
+        if entry is None:
+            return None
+        token, revision = entry
+        # Сброс в другом воркере виден только через общий кеш: локальной
+        # копии верим, пока её ревизия там на месте.
+        if settings.AUTH_TOKEN_SHARED_CACHE and revision != _revision(
+            digest
+        ):
+            token_cache.discard(digest)
+            return None
+        return token
+
+    def _cached(self, digest):
+        token = self._local(digest)
+        if token is not None:
+            metrics.record_cache('auth_token', True)
+            return token
+        metrics.record_cache('auth_token', False)
+        if not settings.AUTH_TOKEN_SHARED_CACHE:
+            return None
+        revision = _revision(digest)
+        token = revision and cache.get(CACHE_KEY.format(digest))
+        metrics.record_cache('auth_token_shared', bool(token))
+        if token:
+            token_cache.set(digest, (token, revision))
+        return token or None
+
+    def _store(self, digest, token):
+        revision = None
+        if settings.AUTH_TOKEN_SHARED_CACHE:
+            revision = uuid.uuid4().hex
+            cache.set_many({
+                CACHE_KEY.format(digest): token,
+                REVISION_KEY.format(digest): revision,
+            }, settings.AUTH_TOKEN_CACHE_TTL)
+        token_cache.set(digest, (token, revision))
+
+    def authenticate_credentials(self, key):
+        digest = _digest(key)
+        token = self._cached(digest)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            self._store(digest, token)
+        elif not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        # Копия, чтобы запросы не меняли общий закешированный объект.
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return token.user, token
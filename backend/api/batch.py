@@ -0,0 +1,171 @@
+import contextvars
+import io
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram_backend.db.replicas import pin_to_primary
+from foodgram_backend.metrics import QueryCounter
+
+
+NOT_BATCHABLE = 'Адрес {} нельзя вызвать в пакетном запросе.'
+
+NOT_EMBEDDABLE = (
+    'Ответ типа {} нельзя вложить в пакетный ответ, запросите {} отдельно.'
+)
+
+ITEM_FAILED = 'Внутренняя ошибка при выполнении вложенного запроса.'
+
+logger = logging.getLogger('foodgram.batch')
+
+FORWARDED_META = (
+    'REMOTE_ADDR', 'SCRIPT_NAME', 'SERVER_NAME', 'SERVER_PORT',
+    'wsgi.url_scheme',
+)
+
+
+# Заголовки относятся к самому пакету, а ответы вложенных запросов
+# вкладываются в него как есть: без сжатия и без 304.
+BATCH_ONLY_HEADERS = (
+    'HTTP_ACCEPT_ENCODING', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE',
+)
+
+
+def _wsgi_str(value):
+    # Строки окружения WSGI — это байты UTF-8, прочитанные как latin-1.
+    return value.encode().decode('iso-8859-1')
+
+
+def _sub_request(request, item):
+    path, _, query = item['path'].partition('?')
+    body = (
+        json.dumps(item['body']).encode() if item.get('body') is not None
+        else b''
+    )
+    environ = {
+        key: value for key, value in request.META.items()
+        if key.startswith('HTTP_') and key not in BATCH_ONLY_HEADERS
+        or key in FORWARDED_META
+    }
+    environ.update({
+        'PATH_INFO': _wsgi_str(path),
+        'QUERY_STRING': _wsgi_str(query),
+        'REQUEST_METHOD': item['method'],
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    })
+    sub_request = WSGIRequest(environ)
+    # Пакет уже аутентифицирован: вложенные запросы не проверяют токен
+    # повторно.
+    if request.user.is_authenticated:
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def _dispatch(request, item, viewsets):
+    try:
+        match = resolve(item['path'].partition('?')[0])
+    except Resolver404:
+        match = None
+    if match is None or getattr(match.func, 'cls', None) not in viewsets:
+        return status.HTTP_404_NOT_FOUND, {
+            'detail': NOT_BATCHABLE.format(item['path'])
+        }
+    sub_request = _sub_request(request, item)
+    sub_request.resolver_match = match
+    response = match.func(sub_request, *match.args, **match.kwargs)
+    if hasattr(response, 'data'):
+        return response.status_code, response.data
+    return _embed(item, response)
+
+
+def _embed(item, response):
+    # JSON вкладывается объектом, текст — строкой. Двоичные ответы (архивы)
+    # в JSON не помещаются: такой ответ не читается вовсе.
+    content_type = response.get('Content-Type', '').partition(';')[0]
+    if not (
+        content_type.endswith('json') or content_type.startswith('text/')
+    ):
+        return status.HTTP_406_NOT_ACCEPTABLE, {
+            'detail': NOT_EMBEDDABLE.format(content_type, item['path'])
+        }
+    content = (
+        b''.join(response.streaming_content) if response.streaming
+        else response.content
+    )
+    if not content:
+        return response.status_code, None
+    if content_type.endswith('json'):
+        return response.status_code, json.loads(content)
+    return response.status_code, content.decode(response.charset)
+
+
+def _execute(request, item, viewsets):
+    counter = QueryCounter()
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        try:
+            status_code, body = _dispatch(request, item, viewsets)
+        except Exception:
+            # Ошибка одного запроса не роняет весь пакет.
+            logger.exception('Вложенный запрос %s %s упал', item['method'],
+                             item['path'])
+            status_code, body = status.HTTP_500_INTERNAL_SERVER_ERROR, {
+                'detail': ITEM_FAILED
+            }
+    return {
+        'status': status_code,
+        'body': body,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+        'queries': counter.queries,
+    }
+
+
+def _in_thread(request, item, viewsets):
+    # Потоки пула открывают собственные соединения с базой.
+    try:
+        return _execute(request, item, viewsets)
+    finally:
+        connections.close_all()
+
+
+def run_batch(request, items, viewsets):
+    # Чтения выполняются параллельно, запись — барьер: она ждёт
+    # предыдущие чтения и видна всем последующим.
+    results = [None] * len(items)
+    wrote = False
+    with ThreadPoolExecutor(settings.BATCH_MAX_WORKERS) as executor:
+        reads = []
+
+        def flush():
+            for index, future in reads:
+                results[index] = future.result()
+            reads.clear()
+
+        for index, item in enumerate(items):
+            if item['method'] in SAFE_METHODS:
+                reads.append((index, executor.submit(
+                    contextvars.copy_context().run,
+                    _in_thread, request, item, viewsets
+                )))
+                continue
+            flush()
+            results[index] = _execute(request, item, viewsets)
+            if results[index]['status'] < status.HTTP_400_BAD_REQUEST:
+                wrote = True
+                pin_to_primary(request)
+        flush()
+    return results, wrote
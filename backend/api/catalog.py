@@ -0,0 +1,55 @@
+import gzip
+import re
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+
+from .renderers import FastJSONRenderer
+from foodgram_backend import metrics
+from recipes.catalog import CATALOG_FIELDS, catalog_changes, current_version
+
+
+SNAPSHOT_KEY = 'ingredient-catalog:{}:{}'
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+def catalog_snapshot(since):
+    # Полный снимок и дельты от уже выданных версий одинаковы для всех
+    # клиентов, поэтому JSON и его gzip-версия считаются один раз.
+    version = current_version()
+    if since > version:
+        # Версия из будущего бывает после восстановления базы из бэкапа:
+        # клиент получает полный снимок с since=0 и заменяет им свой.
+        since = 0
+    snapshot = cache.get(SNAPSHOT_KEY.format(version, since))
+    metrics.record_cache('ingredient_catalog', snapshot is not None)
+    if snapshot is None:
+        version, rows, removed = catalog_changes(since)
+        content = FastJSONRenderer().render({
+            'version': version,
+            'since': since,
+            'fields': CATALOG_FIELDS,
+            'removed': removed,
+            'rows': rows,
+        })
+        snapshot = version, content, gzip.compress(content, mtime=0)
+        cache.set(SNAPSHOT_KEY.format(version, since), snapshot)
+    return since, snapshot
+
+
+def catalog_response(request, since):
+    since, (version, content, compressed) = catalog_snapshot(since)
+    etag = quote_etag(f'{version}-{since}')
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    elif ACCEPTS_GZIP.search(request.headers.get('Accept-Encoding', '')):
+        response = HttpResponse(compressed, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core import checks
+
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+SHARED_CACHE_REQUIRED = (
+    '{} требует общего для всех воркеров кеша, а CACHES[{!r}] '
+    'использует {}.'
+)
+
+SHARED_CACHE_HINT = (
+    'Укажите CACHE_BACKEND с Redis или Memcached либо выключите {}.'
+)
+
+
+def _shared_cache_error(setting, alias, id):
+    backend = settings.CACHES[alias]['BACKEND']
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [checks.Error(
+        SHARED_CACHE_REQUIRED.format(setting, alias, backend),
+        hint=SHARED_CACHE_HINT.format(setting), id=id,
+    )]
+
+
+@checks.register(checks.Tags.caches)
+def check_response_cache(app_configs, **kwargs):
+    # В кеше процесса воркеры не видят ни ответов, ни блокировок,
+    # ни поколений друг друга: правка рецепта не сбросила бы чужие ответы.
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return []
+    return _shared_cache_error('RESPONSE_CACHE_ENABLED', 'default', 'api.E001')
+
+
+@checks.register(checks.Tags.caches)
+def check_replica_pin(app_configs, **kwargs):
+    # Запись в одном воркере должна уводить клиента с реплик во всех.
+    if not settings.DATABASE_REPLICAS:
+        return []
+    return _shared_cache_error('DATABASE_REPLICAS', 'default', 'api.E002')
+
+
+@checks.register(checks.Tags.caches)
+def check_throttle_cache(app_configs, **kwargs):
+    # С вёдрами в кеше процесса реальный лимит в число воркеров больше.
+    if not settings.THROTTLE_ENABLED:
+        return []
+    return _shared_cache_error(
+        'THROTTLE_ENABLED', settings.THROTTLE_CACHE, 'api.E003'
+    )
+
+
+@checks.register(checks.Tags.caches)
+def check_auth_token_cache(app_configs, **kwargs):
+    # Через общий кеш воркеры узнают о выходе и смене пароля.
+    if not settings.AUTH_TOKEN_SHARED_CACHE:
+        return []
+    return _shared_cache_error(
+        'AUTH_TOKEN_SHARED_CACHE', 'default', 'api.E004'
+    )
@@ -0,0 +1,185 @@
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from foodgram_backend import metrics
+
+
+RESPONSE_KEY = 'response-entry:{}'
+
+LOCK_KEY = 'response-lock:{}'
+
+GENERATION_KEY = 'response-generation:{}'
+
+SHARED = 'shared'
+
+# Тип содержимого выставляет рендерер, а X-Cache — сам кеш.
+REPLAYED_HEADERS_EXCLUDED = 'content-type', 'x-cache'
+
+
+class SingleFlight:
+    # Одинаковые запросы внутри процесса ждут результат первого из них,
+    # а не считают его каждый заново.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = [threading.Event(), None]
+        if not leader:
+            call[0].wait(settings.RESPONSE_COALESCING_WAIT)
+            return call[1], False
+        try:
+            call[1] = func()
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call[0].set()
+        return call[1], True
+
+
+single_flight = SingleFlight()
+
+
+def _new_generation():
+    return uuid.uuid4().hex
+
+
+def _generations(user_id):
+    return [
+        cache.get_or_set(GENERATION_KEY.format(scope), _new_generation)
+        for scope in (SHARED, user_id) if scope is not None
+    ]
+
+
+def bump_generation(user_id=None):
+    # Правка рецепта меняет ответы всем, избранное и подписки — только
+    # самому пользователю.
+    cache.delete(GENERATION_KEY.format(
+        SHARED if user_id is None else user_id
+    ))
+
+
+def _key(view, request):
+    user_id = request.user.pk if request.user.is_authenticated else None
+    # Ссылки на картинки в ответе абсолютные, поэтому хост тоже в ключе.
+    raw = '|'.join([
+        type(view).__name__, view.action, request.build_absolute_uri('/'),
+        request.path,
+        '&'.join(sorted(
+            f'{name}={value}'
+            for name, values in request.query_params.lists()
+            for value in values
+        )),
+        request.accepted_renderer.format,
+        str(user_id or ''), *_generations(user_id),
+    ])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _store(key, response):
+    if response.status_code != status.HTTP_200_OK:
+        return None
+    entry = {
+        'data': response.data,
+        'status': response.status_code,
+        'headers': {
+            name: value for name, value in response.items()
+            if name.lower() not in REPLAYED_HEADERS_EXCLUDED
+        },
+        'fresh_until': time.time() + settings.RESPONSE_CACHE_TTL,
+    }
+    cache.set(
+        RESPONSE_KEY.format(key), entry,
+        settings.RESPONSE_CACHE_TTL + settings.RESPONSE_CACHE_STALE
+    )
+    return entry
+
+
+def _compute(key, compute):
+    # Между процессами запрос считает тот, кто взял блокировку в кеше,
+    # остальные ждут, пока ответ появится в кеше.
+    lock = LOCK_KEY.format(key)
+    locked = cache.add(lock, 1, settings.RESPONSE_COALESCING_WAIT)
+    if not locked:
+        deadline = time.monotonic() + settings.RESPONSE_COALESCING_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(settings.RESPONSE_COALESCING_POLL)
+            entry = cache.get(RESPONSE_KEY.format(key))
+            if entry is not None:
+                return entry, None
+    # Не дождавшись, запрос считает ответ сам, но чужую блокировку
+    # не снимает: иначе следом начал бы считать и третий.
+    try:
+        response = compute()
+        return _store(key, response), response
+    finally:
+        if locked:
+            cache.delete(lock)
+
+
+def _respond(entry, state):
+    metrics.record_cache('responses', True)
+    response = Response(
+        entry['data'], status=entry['status'], headers=entry['headers']
+    )
+    response['X-Cache'] = state
+    return response
+
+
+def _computed(response):
+    metrics.record_cache('responses', False)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def _revalidate(key, compute):
+    try:
+        response = compute()
+    finally:
+        cache.delete(LOCK_KEY.format(key))
+    _store(key, response)
+    return _computed(response)
+
+
+def coalesced(method):
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        def compute():
+            return method(view, request, *args, **kwargs)
+
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return compute()
+        key = _key(view, request)
+        entry = cache.get(RESPONSE_KEY.format(key))
+        if entry is not None:
+            if time.time() < entry['fresh_until']:
+                return _respond(entry, 'HIT')
+            # Устаревший ответ отдаётся сразу, пока один запрос
+            # пересчитывает его.
+            if cache.add(
+                LOCK_KEY.format(key), 1, settings.RESPONSE_COALESCING_WAIT
+            ):
+                return _revalidate(key, compute)
+            return _respond(entry, 'STALE')
+        result, leader = single_flight.do(
+            key, lambda: _compute(key, compute)
+        )
+        entry, response = result or (None, None)
+        if leader and response is not None:
+            return _computed(response)
+        if entry is None:
+            return _computed(compute())
+        return _respond(entry, 'COALESCED')
+    return wrapper
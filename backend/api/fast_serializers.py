@@ -0,0 +1,210 @@
+from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
+
+from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, Value
+
+from .serializers import (
+    IngredientSerializer, ReadRecipeIngredientSerializer,
+    ReadRecipeSerializer, RecipeListSerializer, TagSerializer, UserSerializer
+)
+from .utils import (
+    RECIPE_COLUMNS, RECIPE_EXPANDABLE_FIELDS, RECIPE_FLAGS,
+    annotate_is_subscribed
+)
+from recipes.models import Recipe, RecipeIngredients
+
+
+User = get_user_model()
+
+RECIPE_VALUES = 'id', 'name', 'text', 'cooking_time', 'image', 'author_id'
+
+RECIPE_LIST_VALUES = 'id', 'name', 'image', 'cooking_time'
+
+
+# Порядок ключей и источники значений берутся из объявлений обычных
+# сериализаторов, поэтому ответы совпадают байт в байт.
+@lru_cache(maxsize=None)
+def _field_sources(serializer_class):
+    return tuple(
+        (name, field.source.replace('.', '__'))
+        for name, field in serializer_class().fields.items()
+    )
+
+
+def _file_url(storage, request):
+    def url(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        if request is None:
+            return url
+        return request.build_absolute_uri(url)
+    return url
+
+
+def _compile(serializer_class, prefix='', **overrides):
+    return tuple(
+        (name, overrides.get(name) or itemgetter(prefix + source))
+        for name, source in _field_sources(serializer_class)
+    )
+
+
+def _build(rows, accessors):
+    return [{name: get(row) for name, get in accessors} for row in rows]
+
+
+def _simple_data(serializer_class, queryset):
+    return list(queryset.values(*(
+        source for _, source in _field_sources(serializer_class)
+    )))
+
+
+def tags_data(tags):
+    return _simple_data(TagSerializer, tags)
+
+
+def ingredients_data(ingredients):
+    return _simple_data(IngredientSerializer, ingredients)
+
+
+def _image(request):
+    return _file_url(Recipe._meta.get_field('image').storage, request)
+
+
+def recipe_list_data(rows, request):
+    image = _image(request)
+    return _build(rows, _compile(
+        RecipeListSerializer,
+        image=lambda row: image(row['image']),
+    ))
+
+
+def users_data(users, request):
+    avatar = _file_url(User._meta.get_field('avatar').storage, request)
+    sources = [
+        source for name, source in _field_sources(UserSerializer)
+        if name != 'is_subscribed'
+    ]
+    is_subscribed = itemgetter('is_subscribed')
+    if request is None:
+        users = users.annotate(is_subscribed=Value(None, BooleanField()))
+    else:
+        users = annotate_is_subscribed(users, request.user)
+    sources.append('is_subscribed')
+    return _build(users.values(*sources), _compile(
+        UserSerializer,
+        avatar=lambda row: avatar(row['avatar']),
+        is_subscribed=is_subscribed,
+    ))
+
+
+def _grouped(rows, accessors):
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row['recipe_id']].append(
+            {name: get(row) for name, get in accessors}
+        )
+    return groups
+
+
+def _user_recipe_ids(model, user, recipe_ids):
+    return set(model.objects.filter(
+        user=user, recipe_id__in=recipe_ids
+    ).values_list('recipe_id', flat=True))
+
+
+def recipe_rows(recipes, fieldset=None):
+    if fieldset is None:
+        columns = RECIPE_VALUES
+    else:
+        columns = ['id', *(
+            RECIPE_COLUMNS[field] for field in fieldset[0]
+            if field in RECIPE_COLUMNS
+        )]
+        if 'author' in columns:
+            columns[columns.index('author')] = 'author_id'
+    return recipes.prefetch_related(None).values(*columns)
+
+
+def recipe_list_rows(recipes):
+    return recipes.prefetch_related(None).values(*RECIPE_LIST_VALUES)
+
+
+def _grouped_ids(rows, column):
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row['recipe_id']].append(row[column])
+    return groups
+
+
+def _related(model, recipe_ids, order_by, sources, accessors, column):
+    related = model.objects.filter(recipe_id__in=recipe_ids).order_by(
+        order_by
+    )
+    if accessors is None:
+        return _grouped_ids(related.values('recipe_id', column), column)
+    return _grouped(related.values('recipe_id', *sources), accessors)
+
+
+def read_recipes_data(rows, request, fieldset=None):
+    fields, expand = fieldset or (
+        ReadRecipeSerializer.Meta.fields, RECIPE_EXPANDABLE_FIELDS
+    )
+    rows = list(rows)
+    recipe_ids = [row['id'] for row in rows]
+    overrides = {}
+    if 'author' in fields:
+        if 'author' in expand:
+            authors = {
+                author['id']: author for author in users_data(
+                    User.objects.filter(
+                        pk__in={row['author_id'] for row in rows}
+                    ),
+                    request
+                )
+            }
+            overrides['author'] = lambda row: authors[row['author_id']]
+        else:
+            overrides['author'] = itemgetter('author_id')
+    if 'tags' in fields:
+        expanded = 'tags' in expand
+        tags = _related(
+            Recipe.tags.through, recipe_ids, 'tag__name',
+            [f'tag__{source}' for _, source in _field_sources(TagSerializer)],
+            _compile(TagSerializer, prefix='tag__') if expanded else None,
+            'tag_id',
+        )
+        overrides['tags'] = lambda row: tags[row['id']]
+    if 'ingredients' in fields:
+        expanded = 'ingredients' in expand
+        ingredients = _related(
+            RecipeIngredients, recipe_ids, 'pk',
+            [
+                source for _, source
+                in _field_sources(ReadRecipeIngredientSerializer)
+            ],
+            _compile(ReadRecipeIngredientSerializer) if expanded else None,
+            'ingredient_id',
+        )
+        overrides['ingredients'] = lambda row: ingredients[row['id']]
+    user = request.user if request is not None else None
+    for flag, model in RECIPE_FLAGS.items():
+        if flag not in fields:
+            continue
+        if user is None:
+            overrides[flag] = lambda row: None
+            continue
+        marked = (
+            _user_recipe_ids(model, user, recipe_ids)
+            if user.is_authenticated else ()
+        )
+        overrides[flag] = lambda row, marked=marked: row['id'] in marked
+    if 'image' in fields:
+        image = _image(request)
+        overrides['image'] = lambda row: image(row['image'])
+    return _build(rows, tuple(
+        accessor for accessor in _compile(ReadRecipeSerializer, **overrides)
+        if accessor[0] in fields
+    ))
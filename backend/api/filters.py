@@ -1,21 +1,17 @@
 import django_filters
-from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 
 from recipes.models import Ingredient, Recipe, Tag
 
 
-User = get_user_model()
+TAGS_MODE_ANY = 'any'
 
+TAGS_MODE_ALL = 'all'
 
-class LimitFilter(django_filters.FilterSet):
-    limit = django_filters.NumberFilter(method='filter_limit')
-
-    class Meta:
-        model = User
-        fields = 'limit',
-
-    def filter_limit(self, authors, name, value):
-        return authors[:int(value)] if value else authors
+TAGS_MODES = (
+    (TAGS_MODE_ANY, 'Любой из тэгов'),
+    (TAGS_MODE_ALL, 'Все тэги'),
+)
 
 
 class NameFilter(django_filters.FilterSet):
@@ -33,6 +29,10 @@ class RecipeFilter(django_filters.FilterSet):
         field_name='tags__slug',
         to_field_name='slug',
         queryset=Tag.objects.all(),
+        method='filter_tags',
+    )
+    tags_mode = django_filters.ChoiceFilter(
+        choices=TAGS_MODES, method='filter_tags_mode'
     )
     is_favorited = django_filters.Filter(method='filter_is_favorited')
     is_in_shopping_cart = django_filters.Filter(
@@ -43,6 +43,25 @@ class RecipeFilter(django_filters.FilterSet):
         model = Recipe
         fields = 'author',
 
+    def _has_tags(self, tags):
+        return Exists(Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'), tag__in=tags
+        ))
+
+    def filter_tags(self, recipes, name, tags):
+        # Полусоединение EXISTS вместо JOIN: рецепт с несколькими
+        # выбранными тэгами попадает в выдачу один раз.
+        if not tags:
+            return recipes
+        if self.form.cleaned_data.get('tags_mode') == TAGS_MODE_ALL:
+            for tag in tags:
+                recipes = recipes.filter(self._has_tags([tag]))
+            return recipes
+        return recipes.filter(self._has_tags(tags))
+
+    def filter_tags_mode(self, recipes, name, value):
+        return recipes
+
     def filter_is_favorited(self, recipes, name, value):
         if self.request.user.is_authenticated and value == '1':
             return recipes.filter(favorites__user=self.request.user)
@@ -0,0 +1,26 @@
+import statistics
+from time import perf_counter
+
+from django.core.management import base
+
+
+class BenchmarkCommand(base.BaseCommand):
+    help = 'Замер производительности.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз повторять каждый замер.'
+        )
+
+    def measure(self, label, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = perf_counter()
+            result = func()
+            timings.append(perf_counter() - started)
+        self.stdout.write(
+            f'{label}: медиана {statistics.median(timings) * 1000:.2f} мс, '
+            f'лучшее {min(timings) * 1000:.2f} мс'
+        )
+        return result, statistics.median(timings)
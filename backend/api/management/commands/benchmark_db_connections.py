@@ -0,0 +1,55 @@
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.test import RequestFactory
+
+from .benchmark import BenchmarkCommand
+from api.views import TagViewSet
+
+
+MODES = (
+    ('Новое соединение на каждый запрос', 0, False),
+    ('Постоянное соединение', None, False),
+    ('Постоянное соединение с проверкой здоровья', None, True),
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Задержка дешёвого запроса (список тэгов) с новым соединением '
+        'на каждый запрос и с переиспользованием соединения.'
+    )
+
+    def _request(self):
+        # Сигналы начала и конца запроса закрывают устаревшие соединения
+        # так же, как обработчик WSGI.
+        request_started.send(sender=self.__class__)
+        try:
+            self.view(self.factory.get('/api/tags/')).render()
+        finally:
+            request_finished.send(sender=self.__class__)
+
+    def handle(self, *args, **options):
+        self.factory = RequestFactory()
+        self.view = TagViewSet.as_view({'get': 'list'})
+        settings_dict = connection.settings_dict
+        original = {
+            key: settings_dict.get(key)
+            for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')
+        }
+        timings = {}
+        try:
+            for label, max_age, health_checks in MODES:
+                connection.close()
+                settings_dict['CONN_MAX_AGE'] = max_age
+                settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+                _, timings[label] = self.measure(
+                    label, self._request, options['repeat']
+                )
+        finally:
+            connection.close()
+            settings_dict.update(original)
+        new, persistent = timings[MODES[0][0]], timings[MODES[1][0]]
+        self.stdout.write(self.style.SUCCESS(
+            f'Экономия на запросе: {(new - persistent) * 1000:.2f} мс '
+            f'({new / persistent:.1f}x)'
+        ))
@@ -0,0 +1,96 @@
+import base64
+import io
+import json
+import random
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import base
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from .benchmark import BenchmarkCommand
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import ReadRecipeSerializer
+from api.utils import prefetch_for_reading
+from recipes.models import Ingredient, Recipe, Tag
+
+
+NO_ORJSON = 'orjson не установлен: быстрый путь совпадает со stdlib.'
+
+MISMATCH = 'Результаты расходятся: {}'
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнение JSONRenderer и JSONParser со stdlib и с orjson '
+        'на странице рецептов и на создании рецепта с картинкой.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--rows', type=int, default=100,
+            help='Сколько рецептов рендерить за один замер.'
+        )
+        parser.add_argument(
+            '--image-kb', type=int, default=512,
+            help='Размер картинки в теле POST, КБ.'
+        )
+
+    def _recipe_post(self, image_kb):
+        rng = random.Random(0)
+        image = base64.b64encode(rng.getrandbits(image_kb * 8192).to_bytes(
+            image_kb * 1024, 'little'
+        )).decode()
+        return json.dumps({
+            'name': 'Бабушкин пирог',
+            'text': 'Смешать, испечь, подавать горячим. ' * 20,
+            'cooking_time': 45,
+            'tags': list(Tag.objects.values_list('pk', flat=True)[:2]),
+            'ingredients': [
+                {'id': pk, 'amount': rng.randint(1, 500)}
+                for pk in Ingredient.objects.values_list('pk', flat=True)[:10]
+            ],
+            'image': f'data:image/png;base64,{image}',
+        }, ensure_ascii=False).encode()
+
+    def _compare(self, label, slow, fast, repeat, size):
+        slow_result, slow_time = self.measure(
+            f'{label}, stdlib', slow, repeat
+        )
+        fast_result, fast_time = self.measure(
+            f'{label}, быстрый', fast, repeat
+        )
+        if slow_result != fast_result:
+            raise base.CommandError(MISMATCH.format(label))
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {size / 2**20 / slow_time:.0f} МБ/с против '
+            f'{size / 2**20 / fast_time:.0f} МБ/с '
+            f'({slow_time / fast_time:.1f}x)'
+        ))
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(NO_ORJSON))
+        repeat = options['repeat']
+        page = ReadRecipeSerializer(
+            prefetch_for_reading(
+                Recipe.objects.all(), AnonymousUser()
+            )[:options['rows']],
+            many=True
+        ).data
+        rendered = JSONRenderer().render(page)
+        self._compare(
+            f'Рендер {len(page)} рецептов',
+            lambda: JSONRenderer().render(page),
+            lambda: FastJSONRenderer().render(page),
+            repeat, len(rendered)
+        )
+        body = self._recipe_post(options['image_kb'])
+        self._compare(
+            'Разбор POST рецепта',
+            lambda: JSONParser().parse(io.BytesIO(body)),
+            lambda: FastJSONParser().parse(io.BytesIO(body)),
+            repeat, len(body)
+        )
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import base
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .benchmark import BenchmarkCommand
+from api.fast_serializers import (
+    ingredients_data, read_recipes_data, recipe_list_data, recipe_list_rows,
+    recipe_rows, tags_data
+)
+from api.serializers import (
+    IngredientSerializer, ReadRecipeSerializer, RecipeListSerializer,
+    TagSerializer
+)
+from api.utils import prefetch_for_reading
+from recipes.models import FoodgramUser, Ingredient, Recipe, Tag
+
+
+PARITY_ERROR = 'Ответы расходятся ({}, {}): {}…\n{}…'
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Проверка совпадения ответов быстрых сериализаторов с обычными '
+        'и сравнение их скорости в строках в секунду.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--rows', type=int, default=200,
+            help='Сколько рецептов сериализовать за один замер.'
+        )
+
+    def _cases(self, request, rows):
+        context = {'request': request}
+        return {
+            'Тэги': (
+                lambda: TagSerializer(Tag.objects.all(), many=True).data,
+                lambda: tags_data(Tag.objects.all()),
+            ),
+            'Продукты': (
+                lambda: IngredientSerializer(
+                    Ingredient.objects.all(), many=True
+                ).data,
+                lambda: ingredients_data(Ingredient.objects.all()),
+            ),
+            'Краткие рецепты': (
+                lambda: RecipeListSerializer(
+                    Recipe.objects.all()[:rows], many=True, context=context
+                ).data,
+                lambda: recipe_list_data(
+                    recipe_list_rows(Recipe.objects.all())[:rows], request
+                ),
+            ),
+            'Рецепты': (
+                lambda: ReadRecipeSerializer(
+                    prefetch_for_reading(
+                        Recipe.objects.all(), request.user
+                    )[:rows],
+                    many=True, context=context
+                ).data,
+                lambda: read_recipes_data(
+                    recipe_rows(Recipe.objects.all())[:rows], request
+                ),
+            ),
+        }
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        active_user = FoodgramUser.objects.annotate(
+            activity=Count('favorites') + Count('shoppingcarts')
+        ).order_by('-activity').first()
+        users = {'аноним': AnonymousUser()}
+        if active_user is not None:
+            users[active_user.username] = active_user
+        for username, user in users.items():
+            request = Request(APIRequestFactory().get(
+                '/api/recipes/',
+                HTTP_HOST=(settings.ALLOWED_HOSTS or ['localhost'])[0]
+            ))
+            request.user = user
+            self.stdout.write(f'Пользователь: {username}')
+            for label, (slow, fast) in self._cases(
+                request, options['rows']
+            ).items():
+                slow_data, slow_time = self.measure(
+                    f'  {label}, ModelSerializer', slow, options['repeat']
+                )
+                fast_data, fast_time = self.measure(
+                    f'  {label}, values()', fast, options['repeat']
+                )
+                slow_json = renderer.render(slow_data)
+                fast_json = renderer.render(fast_data)
+                if slow_json != fast_json:
+                    raise base.CommandError(PARITY_ERROR.format(
+                        username, label, slow_json[:300], fast_json[:300]
+                    ))
+                rows = len(slow_data)
+                self.stdout.write(self.style.SUCCESS(
+                    f'  {label}: ответы совпадают, строк {rows}; '
+                    f'{rows / slow_time:.0f} строк/с против '
+                    f'{rows / fast_time:.0f} строк/с '
+                    f'({slow_time / fast_time:.1f}x)'
+                ))
@@ -0,0 +1,56 @@
+from django.http import QueryDict
+
+from .benchmark import BenchmarkCommand
+from api.filters import RecipeFilter
+from recipes.models import Recipe, Tag
+
+
+PAGE_SIZE = 6
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнение фильтрации рецептов по тэгам через JOIN и через '
+        'EXISTS: время первой страницы с подсчётом и число дублей.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--tags', nargs='*',
+            help='Slug тэгов, по умолчанию — все тэги.'
+        )
+
+    def _page(self, recipes):
+        return recipes.count(), list(
+            recipes.values_list('pk', flat=True)[:PAGE_SIZE]
+        )
+
+    def handle(self, *args, **options):
+        slugs = options['tags'] or list(
+            Tag.objects.values_list('slug', flat=True)
+        )
+        repeat = options['repeat']
+        join = Recipe.objects.filter(tags__slug__in=slugs)
+        self.stdout.write(f'Тэги: {", ".join(slugs)}')
+        (count, _), join_time = self.measure(
+            'JOIN (tags__slug__in)', lambda: self._page(join), repeat
+        )
+        self.stdout.write(
+            f'  строк: {count}, '
+            f'уникальных рецептов: {join.distinct().count()}'
+        )
+        timings = {}
+        for mode in ('any', 'all'):
+            data = QueryDict(mutable=True)
+            data.setlist('tags', slugs)
+            data['tags_mode'] = mode
+            exists = RecipeFilter(data, queryset=Recipe.objects.all()).qs
+            (count, _), timings[mode] = self.measure(
+                f'EXISTS ({mode})', lambda: self._page(exists), repeat
+            )
+            self.stdout.write(f'  строк: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            'Отношение времени JOIN к EXISTS (any): '
+            f'{join_time / timings["any"]:.2f}'
+        ))
@@ -0,0 +1,37 @@
+from time import monotonic
+
+from django.core.management import base
+
+from api.warmup import warm_caches
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Прогрев кешей после деплоя: тэги, продукты, каталог, первые '
+        'страницы рецептов и индексы в памяти процесса.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int,
+            help='Сколько первых страниц рецептов прогреть.'
+        )
+        parser.add_argument('--workers', type=int)
+
+    def handle(self, *args, **options):
+        started = monotonic()
+        results = warm_caches(options['pages'], options['workers'])
+        for name, entries, seconds, error in results:
+            if error is None:
+                self.stdout.write(
+                    f'{name}: {entries} за {seconds * 1000:.0f} мс'
+                )
+            else:
+                self.stdout.write(self.style.ERROR(f'{name}: {error}'))
+        message = (
+            f'Прогрето {sum(entries for _, entries, *_ in results)} '
+            f'записей за {monotonic() - started:.2f} с'
+        )
+        if any(error is not None for *_, error in results):
+            raise base.CommandError(message)
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,72 @@
+import math
+import re
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Даты и датаклассы пишет JSONEncoder DRF: он обрезает микросекунды
+# до миллисекунд, а датаклассы вовсе не сериализует.
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+)
+
+# Числа меньше 1e-4 и от 1e16 orjson пишет не так, как repr(): 0.000015
+# вместо 1.5e-05 и 1e16 вместо 1e+16. Ищутся значения после : , [ —
+# редкие совпадения внутри строк лишь отправляют ответ в stdlib.
+STDLIB_FLOATS = re.compile(rb'(?:^|[:,\[])-?(?:0\.0000|\d+(?:\.\d+)?e)')
+
+# Как и JSONRenderer, экранируем разделители строк: JSON должен
+# оставаться подмножеством JavaScript.
+LINE_SEPARATOR = '\u2028'.encode()
+
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+def _has_non_finite(data):
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (float, Decimal)):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # orjson пишет компактный UTF-8, как и настройки DRF по умолчанию;
+        # отступы, ASCII-вывод и всё, что orjson не умеет, уходят в stdlib.
+        if (
+            orjson is None or data is None or self.ensure_ascii
+            or not self.compact or self.get_indent(
+                accepted_media_type, renderer_context or {}
+            ) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            rendered = orjson.dumps(
+                data, default=self.encoder_class().default,
+                option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # NaN и бесконечности orjson молча пишет как null, а JSONRenderer
+        # при STRICT_JSON отказывается их сериализовать.
+        if STDLIB_FLOATS.search(rendered) or (
+            b'null' in rendered and _has_non_finite(data)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return rendered.replace(
+            LINE_SEPARATOR, br'\u2028'
+        ).replace(PARAGRAPH_SEPARATOR, br'\u2029')
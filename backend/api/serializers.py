@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from .utils import RECIPE_EXPANDABLE_FIELDS
 from recipes.models import (
     MIN_VALUE_AMOUNT, MIN_VALUE_COOKING_TIME, Ingredient, Recipe,
     RecipeIngredients, Tag, Subscribe
@@ -18,11 +20,28 @@ NOT_EMPTY_FIELD = 'Поле не должно быть пустым'
 
 ITEMS_NOT_REPEAT = 'Объекты не должны повторяться: {}'
 
+BATCH_TOO_LARGE = 'В пакете не больше {} запросов.'
+
+INVALID_RECIPES_LIMIT = 'Укажите recipes_limit неотрицательным целым числом.'
+
+BATCH_METHODS = 'GET', 'POST', 'PUT', 'PATCH', 'DELETE'
+
+
+def collapsed_field(name):
+    if name == 'ingredients':
+        return serializers.SlugRelatedField(
+            source='recipe_ingredients', slug_field='ingredient_id',
+            many=True, read_only=True
+        )
+    return serializers.PrimaryKeyRelatedField(
+        many=name == 'tags', read_only=True
+    )
+
 
 class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ingredient
-        fields = '__all__'
+        fields = ('id', 'name', 'measurement_unit')
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -38,6 +57,10 @@ class UserSerializer(DjoserUserSerializer):
         fields = (*DjoserUserSerializer.Meta.fields, 'avatar', 'is_subscribed')
 
     def get_is_subscribed(self, subscribing):
+        # Списки пользователей и авторы рецептов приходят с аннотацией,
+        # запрос в базу остаётся только для одиночных объектов.
+        if hasattr(subscribing, 'is_subscribed'):
+            return subscribing.is_subscribed
         request = self.context.get('request')
         return (
             request and request.user.is_authenticated
@@ -85,7 +108,26 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
         )
         read_only_fields = fields
 
-    def _get_is_related(self, recipe, related_name):
+    def get_fields(self):
+        # ?fields= оставляет только перечисленные поля, а вложенные
+        # объекты, не указанные в ?expand=, сворачиваются до id.
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+        if fieldset is None:
+            return fields
+        names, expand = fieldset
+        return {
+            name: (
+                collapsed_field(name)
+                if name in RECIPE_EXPANDABLE_FIELDS and name not in expand
+                else field
+            )
+            for name, field in fields.items() if name in names
+        }
+
+    def _get_is_related(self, recipe, related_name, annotation):
+        if hasattr(recipe, annotation):
+            return getattr(recipe, annotation)
         request = self.context.get('request')
         return request and request.user.is_authenticated and (
             getattr(recipe, related_name)
@@ -94,10 +136,27 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, recipe):
-        return self._get_is_related(recipe, 'favorites')
+        return self._get_is_related(recipe, 'favorites', 'is_favorited')
 
     def get_is_in_shopping_cart(self, recipe):
-        return self._get_is_related(recipe, 'shoppingcarts')
+        return self._get_is_related(
+            recipe, 'shoppingcarts', 'is_in_shopping_cart'
+        )
+
+
+class PantryRecipeSerializer(ReadRecipeSerializer):
+    matched = serializers.SerializerMethodField()
+    missing = serializers.SerializerMethodField()
+
+    class Meta(ReadRecipeSerializer.Meta):
+        fields = (*ReadRecipeSerializer.Meta.fields, 'matched', 'missing')
+        read_only_fields = fields
+
+    def get_matched(self, recipe):
+        return self.context['coverage'][recipe.pk][0]
+
+    def get_missing(self, recipe):
+        return self.context['coverage'][recipe.pk][1]
 
 
 class WriteRecipeIngredientSerializer(serializers.Serializer):
@@ -144,7 +203,6 @@ class WriteRecipeSerializer(serializers.ModelSerializer):
         self._validate_unique(tags)
         return tags
 
-    @transaction.atomic
     def _set_recipe_ingredients_and_tags(
         self, recipe, recipe_ingredient_data, tag_data
     ):
@@ -157,6 +215,9 @@ class WriteRecipeSerializer(serializers.ModelSerializer):
             ) for ingredient_data in recipe_ingredient_data)
         return recipe
 
+    # Рецепт без состава не должен быть виден ни индексу продуктов,
+    # ни другим запросам.
+    @transaction.atomic
     def create(self, recipe_data):
         recipe_ingredient_data = recipe_data.pop('ingredients')
         tag_data = recipe_data.pop('tags')
@@ -166,6 +227,7 @@ class WriteRecipeSerializer(serializers.ModelSerializer):
             tag_data=tag_data
         )
 
+    @transaction.atomic
     def update(self, old_recipe, new_recipe_data):
         recipe_ingredient_data = new_recipe_data.pop('ingredients')
         tag_data = new_recipe_data.pop('tags')
@@ -188,9 +250,20 @@ class RecipeListSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+def get_recipes_limit(request):
+    recipes_limit = request.GET.get(
+        'recipes_limit', str(settings.RECIPES_LIMIT_MAX)
+    )
+    if not recipes_limit.isdigit():
+        raise serializers.ValidationError(
+            {'recipes_limit': INVALID_RECIPES_LIMIT}
+        )
+    return min(int(recipes_limit), settings.RECIPES_LIMIT_MAX)
+
+
 class SubscribedUserSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(source='recipes.count')
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta(UserSerializer.Meta):
         fields = (*UserSerializer.Meta.fields, 'recipes', 'recipes_count')
@@ -198,5 +271,22 @@ class SubscribedUserSerializer(UserSerializer):
 
     def get_recipes(self, author):
         return RecipeListSerializer(author.recipes.all()[
-            :int(self.context.get('request').GET.get('recipes_limit', 10**10))
+            :get_recipes_limit(self.context.get('request'))
         ], many=True, read_only=True).data
+
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=BATCH_METHODS)
+    path = serializers.RegexField(r'^/api/')
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, requests):
+        if len(requests) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                BATCH_TOO_LARGE.format(settings.BATCH_MAX_REQUESTS)
+            )
+        return requests
@@ -0,0 +1,67 @@
+import hashlib
+from datetime import date
+
+from django.core.cache import caches
+from django.db.models import Sum
+from django.utils.http import parse_etags, quote_etag
+
+from .utils import generate_shopping_list
+from foodgram_backend import metrics
+from recipes.catalog import current_version
+from recipes.models import Ingredient, Recipe, ShoppingCart
+
+
+EXPORT_KEY = 'shopping-list:{}:{}'
+
+
+def _cache():
+    return caches['exports']
+
+
+def cart_version(user):
+    # Версия считается по базе, а не хранится в кеше: у каждого воркера
+    # свой кеш, и сброс версии в одном не дошёл бы до остальных.
+    # Состав рецептов меняет updated_at, переименование продукта — версию
+    # каталога, а имена авторов и пользователя попадают в сам список.
+    rows = ShoppingCart.objects.filter(user=user).order_by(
+        'recipe_id'
+    ).values_list(
+        'recipe_id', 'recipe__updated_at', 'recipe__author__username'
+    )
+    raw = '|'.join([
+        user.username, str(current_version()),
+        *(f'{pk}:{updated_at.isoformat()}:{author}'
+          for pk, updated_at, author in rows),
+    ])
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _render(user):
+    recipes = Recipe.objects.filter(
+        shoppingcarts__user=user
+    ).select_related('author')
+    ingredients = (
+        Ingredient.objects.filter(recipes__in=recipes)
+        .annotate(total_amount=Sum('recipe_ingredients__amount'))
+        .order_by('name')
+    )
+    return generate_shopping_list(user, recipes, ingredients).encode()
+
+
+def export_etag(user):
+    # В шапке списка стоит дата, поэтому выгрузка устаревает и в полночь.
+    return quote_etag(f'{cart_version(user)}-{date.today().isoformat()}')
+
+
+def is_not_modified(request, etag):
+    return etag in parse_etags(request.headers.get('If-None-Match', ''))
+
+
+def get_shopping_list(user, etag):
+    key = EXPORT_KEY.format(user.pk, etag.strip('"'))
+    content = _cache().get(key)
+    metrics.record_cache('shopping_list', content is not None)
+    if content is None:
+        content = _render(user)
+        _cache().set(key, content)
+    return content
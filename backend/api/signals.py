@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_save
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user_tokens
+from .coalescing import bump_generation
+from recipes.models import (
+    Favorite, Ingredient, Recipe, ShoppingCart, Subscribe, Tag
+)
+
+
+# Вход обновляет только last_login: ради него кеши не сбрасываются.
+USER_VOLATILE_FIELDS = ('last_login',)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+def _loaded_state(instance):
+    # Только загруженные поля: отложенные не должны подгружаться запросом.
+    # У FieldFile запоминается имя, сам объект меняется на месте.
+    return {
+        field.attname: getattr(
+            instance.__dict__[field.attname], 'name',
+            instance.__dict__[field.attname]
+        )
+        for field in instance._meta.concrete_fields
+        if field.name not in USER_VOLATILE_FIELDS
+        and field.attname in instance.__dict__
+    }
+
+
+def _user_changed(sender, instance, update_fields):
+    loaded = getattr(instance, '_loaded_state', {})
+    current = _loaded_state(instance)
+    return any(
+        attname not in loaded or loaded[attname] != value
+        for attname, value in current.items()
+        if update_fields is None
+        or sender._meta.get_field(attname).name in update_fields
+    )
+
+
+@receiver(post_init, sender=get_user_model())
+def user_loaded(sender, instance, **kwargs):
+    instance._loaded_state = _loaded_state(instance)
+
+
+@receiver(pre_save, sender=get_user_model())
+def user_saving(sender, instance, raw, update_fields, **kwargs):
+    instance._cached_state_changed = (
+        not raw and instance.pk is not None
+        and _user_changed(sender, instance, update_fields)
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, **kwargs):
+    # Смена пароля, деактивация и правка профиля: закешированный
+    # пользователь устарел.
+    if not created and getattr(instance, '_cached_state_changed', True):
+        invalidate_user_tokens(instance.pk)
+        transaction.on_commit(bump_generation)
+    instance._loaded_state = _loaded_state(instance)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def catalog_changed(sender, **kwargs):
+    transaction.on_commit(bump_generation)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def user_lists_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_generation(instance.user_id))
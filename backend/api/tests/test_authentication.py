@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import _digest, token_cache
+
+
+User = get_user_model()
+
+PASSWORD = 'Stary-parol-2026'
+
+
+@override_settings(AUTH_TOKEN_SHARED_CACHE=True)
+class CachedTokenAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password=PASSWORD,
+            first_name='Имя', last_name='Фамилия'
+        )
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.token = Token.objects.create(user=self.user)
+        self.digest = _digest(self.token.key)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def me(self):
+        return self.client.get('/api/users/me/').status_code
+
+    def other_worker(self):
+        # Копия из локального кеша воркера, который сброса не видел.
+        entry = token_cache.get(self.digest)
+        self.assertIsNotNone(entry)
+        return lambda: token_cache.set(self.digest, entry)
+
+    def test_repeated_requests_served_from_cache(self):
+        self.assertEqual(self.me(), 200)
+        # Остаётся только запрос is_subscribed из сериализатора.
+        with self.assertNumQueries(1):
+            self.client.get('/api/users/me/')
+
+    def test_logout_rejects_token_in_other_workers(self):
+        self.assertEqual(self.me(), 200)
+        restore = self.other_worker()
+        response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        restore()
+        self.assertEqual(self.me(), 401)
+
+    def test_password_change_reloads_user_in_other_workers(self):
+        self.assertEqual(self.me(), 200)
+        restore = self.other_worker()
+        response = self.client.post('/api/users/set_password/', {
+            'current_password': PASSWORD,
+            'new_password': 'Novyi-parol-2026',
+        })
+        self.assertEqual(response.status_code, 204, response.content)
+        restore()
+        self.assertEqual(self.me(), 200)
+        token, _ = token_cache.get(self.digest)
+        self.assertTrue(token.user.check_password('Novyi-parol-2026'))
+
+    def test_deactivation_rejects_token_in_other_workers(self):
+        self.assertEqual(self.me(), 200)
+        restore = self.other_worker()
+        self.user.is_active = False
+        self.user.save()
+        restore()
+        self.assertEqual(self.me(), 401)
+
+    def test_inactive_user_rejected_on_cache_hit(self):
+        with self.settings(AUTH_TOKEN_SHARED_CACHE=False):
+            self.assertEqual(self.me(), 200)
+            token, _ = token_cache.get(self.digest)
+            token.user.is_active = False
+            self.assertEqual(self.me(), 401)
+
+    def test_login_does_not_invalidate(self):
+        self.assertEqual(self.me(), 200)
+        user = User.objects.get(pk=self.user.pk)
+        user.last_login = timezone.now()
+        # Только UPDATE: прежние значения не перечитываются из базы.
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+        self.assertIsNotNone(token_cache.get(self.digest))
+
+    def test_profile_change_invalidates_without_extra_select(self):
+        self.assertEqual(self.me(), 200)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Другое'
+        # UPDATE и выборка токенов пользователя для сброса.
+        with self.assertNumQueries(2):
+            user.save()
+        self.assertIsNone(token_cache.get(self.digest))
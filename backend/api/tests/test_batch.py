@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from api.views import TagViewSet
+from recipes.models import Ingredient, Recipe, ShoppingCart, Tag
+
+
+User = get_user_model()
+
+
+# Чтения идут в потоках со своими соединениями: данные теста должны быть
+# закоммичены.
+class BatchTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='x'
+        )
+        self.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        self.recipe = Recipe.objects.create(
+            author=self.user, name='Омлет', text='-', cooking_time=5,
+            image='recipes/recipes/1.png'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def batch(self, *requests):
+        response = self.client.post('/api/batch/', {'requests': [
+            {'method': method, 'path': path} for method, path in requests
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [
+            (item['status'], item['body'])
+            for item in response.json()['responses']
+        ]
+
+    def test_json_bodies_embedded_as_objects(self):
+        (tags_status, tags), (catalog_status, catalog) = self.batch(
+            ('GET', '/api/tags/'), ('GET', '/api/ingredients/catalog/'),
+        )
+        self.assertEqual(tags_status, 200)
+        self.assertEqual(tags[0]['slug'], 'breakfast')
+        self.assertEqual(catalog_status, 200)
+        self.assertEqual(catalog['rows'][0][1], 'соль')
+
+    def test_text_embedded_as_string(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        [(status, body)] = self.batch(
+            ('GET', '/api/recipes/download_shopping_cart/'),
+        )
+        self.assertEqual(status, 200)
+        self.assertIn('Омлет (@user)', body)
+
+    def test_binary_response_rejected(self):
+        [(status, body)] = self.batch(
+            ('GET', f'/api/users/{self.user.pk}/recipes_export/'),
+        )
+        self.assertEqual(status, 406)
+        self.assertIn('application/zip', body['detail'])
+
+    def test_failed_item_does_not_break_batch(self):
+        with mock.patch.object(
+            TagViewSet, 'list', side_effect=RuntimeError
+        ), self.assertLogs('foodgram.batch', 'ERROR'):
+            responses = self.batch(
+                ('GET', '/api/tags/'), ('GET', f'/api/tags/{self.tag.pk}/'),
+            )
+        self.assertEqual(responses[0][0], 500)
+        self.assertEqual(responses[1], (200, {
+            'id': self.tag.pk, 'name': 'Завтрак', 'slug': 'breakfast'
+        }))
+
+    def test_write_visible_to_later_reads(self):
+        responses = self.batch(
+            ('POST', f'/api/recipes/{self.recipe.pk}/favorite/'),
+            ('GET', f'/api/recipes/{self.recipe.pk}/'),
+        )
+        self.assertEqual(responses[0][0], 201)
+        self.assertTrue(responses[1][1]['is_favorited'])
+
+    def test_unknown_path_not_batchable(self):
+        for path in ('/api/batch/', '/api/metrics/', '/api/nothing/'):
+            with self.subTest(path=path):
+                [(status, _)] = self.batch(('GET', path))
+                self.assertEqual(status, 404)
@@ -0,0 +1,93 @@
+import gzip
+import json
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+
+from recipes.catalog import current_version, next_version, stamp_ingredients
+from recipes.models import Ingredient
+
+
+class CatalogVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get(self, since=None, **headers):
+        params = {} if since is None else {'since': since}
+        return self.client.get('/api/ingredients/catalog/', params, **headers)
+
+    def read(self, since=None):
+        response = self.get(since)
+        self.assertEqual(response.status_code, 200, response.content)
+        return json.loads(response.content)
+
+    def test_every_write_bumps_version(self):
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        self.assertEqual((salt.version, current_version()), (1, 1))
+        salt.name = 'соль морская'
+        salt.save()
+        self.assertEqual((salt.version, current_version()), (2, 2))
+        with transaction.atomic():
+            stamped = stamp_ingredients([
+                Ingredient(name='перец', measurement_unit='г'),
+                Ingredient(name='мука', measurement_unit='г'),
+            ])
+        self.assertEqual({item.version for item in stamped}, {3})
+        salt.delete()
+        self.assertEqual(current_version(), 4)
+
+    def test_snapshot_and_deltas(self):
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        sugar = Ingredient.objects.create(name='сахар', measurement_unit='г')
+        full = self.read()
+        self.assertEqual(full['version'], 2)
+        self.assertEqual(full['fields'], ['id', 'name', 'measurement_unit'])
+        self.assertEqual(full['rows'], [
+            [salt.id, 'соль', 'г'], [sugar.id, 'сахар', 'г'],
+        ])
+        sugar.measurement_unit = 'кг'
+        sugar.save()
+        salt_id = salt.id
+        salt.delete()
+        delta = self.read(full['version'])
+        self.assertEqual(delta['version'], 4)
+        self.assertEqual(delta['rows'], [[sugar.id, 'сахар', 'кг']])
+        self.assertEqual(delta['removed'], [salt_id])
+        self.assertEqual(
+            self.read(delta['version']),
+            {'version': 4, 'since': 4, 'fields': full['fields'],
+             'removed': [], 'rows': []}
+        )
+
+    def test_future_version_gets_full_snapshot(self):
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        snapshot = self.read(100)
+        self.assertEqual((snapshot['since'], len(snapshot['rows'])), (0, 1))
+
+    def test_etag_and_gzip(self):
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], '"1-0"')
+        self.assertEqual(
+            json.loads(gzip.decompress(response.content))['version'], 1
+        )
+        self.assertEqual(
+            self.get(HTTP_IF_NONE_MATCH='"1-0"').status_code, 304
+        )
+        Ingredient.objects.create(name='перец', measurement_unit='г')
+        response = self.get(HTTP_IF_NONE_MATCH='"1-0"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"2-0"')
+
+    def test_invalid_since_rejected(self):
+        for since in ('-1', 'abc', '1.5'):
+            with self.subTest(since=since):
+                self.assertEqual(self.get(since).status_code, 400)
+
+
+class NextVersionTests(SimpleTestCase):
+    def test_requires_transaction(self):
+        with self.assertRaises(RuntimeError):
+            next_version()
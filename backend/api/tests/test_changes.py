@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.changes import decode_cursor, encode_cursor
+from recipes.models import Recipe, RecipeTombstone
+
+
+User = get_user_model()
+
+
+@override_settings(RECIPE_CHANGES_LAG=60)
+class RecipeChangesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+        cls.moment = timezone.now() - timedelta(hours=1)
+        cls.ids = [
+            Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}', text='-',
+                cooking_time=5, image='recipes/recipes/1.png'
+            ).id for number in range(5)
+        ]
+        # Три рецепта изменены в одну и ту же микросекунду.
+        Recipe.objects.filter(pk__in=cls.ids[:3]).update(
+            updated_at=cls.moment
+        )
+        Recipe.objects.filter(pk__in=cls.ids[3:]).update(
+            updated_at=cls.moment + timedelta(seconds=1)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def page(self, **params):
+        response = self.client.get('/api/recipes/changes/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def walk(self, **params):
+        seen, cursor = [], None
+        while True:
+            if cursor:
+                params['cursor'] = cursor
+            page = self.page(limit=2, **params)
+            seen += [(item['id'], item['deleted']) for item in page['results']]
+            cursor = page['cursor']
+            if not page['has_more']:
+                return seen, cursor
+
+    def test_ties_paged_without_gaps_or_repeats(self):
+        seen, _ = self.walk()
+        self.assertEqual(seen, [(pk, False) for pk in self.ids])
+
+    def test_deletes_merged_by_time_and_id(self):
+        deleted = self.ids[1]
+        Recipe.objects.get(pk=deleted).delete()
+        RecipeTombstone.objects.filter(recipe_id=deleted).update(
+            deleted_at=self.moment
+        )
+        seen, _ = self.walk()
+        self.assertEqual(seen, [
+            (self.ids[0], False), (deleted, True), (self.ids[2], False),
+            (self.ids[3], False), (self.ids[4], False),
+        ])
+        item = self.page(limit=2)['results'][1]
+        self.assertIsNone(item['recipe'])
+
+    def test_cursor_resumes_after_later_changes(self):
+        _, cursor = self.walk()
+        self.assertEqual(self.page(cursor=cursor)['results'], [])
+        self.assertEqual(self.page(cursor=cursor)['cursor'], cursor)
+        Recipe.objects.filter(pk=self.ids[0]).update(
+            updated_at=self.moment + timedelta(seconds=2)
+        )
+        Recipe.objects.get(pk=self.ids[4]).delete()
+        RecipeTombstone.objects.update(
+            deleted_at=self.moment + timedelta(seconds=2)
+        )
+        seen, _ = self.walk(cursor=cursor)
+        self.assertEqual(seen, [(self.ids[0], False), (self.ids[4], True)])
+
+    def test_recent_changes_held_back(self):
+        Recipe.objects.filter(pk=self.ids[0]).update(updated_at=timezone.now())
+        seen, _ = self.walk()
+        self.assertEqual(seen, [(pk, False) for pk in self.ids[1:]])
+
+    def test_updated_since(self):
+        since = (self.moment + timedelta(seconds=1)).isoformat()
+        self.assertEqual(
+            [item['id'] for item in self.page(updated_since=since)['results']],
+            self.ids[3:]
+        )
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(
+            decode_cursor(encode_cursor(self.moment, 42)), (self.moment, 42)
+        )
+
+    def test_invalid_parameters_rejected(self):
+        for params in (
+            {'cursor': 'мусор'}, {'updated_since': 'вчера'},
+            {'limit': '0'}, {'limit': '1001'}, {'limit': 'abc'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get('/api/recipes/changes/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(params)), response.json())
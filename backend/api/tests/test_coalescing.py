@@ -0,0 +1,115 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from api.coalescing import LOCK_KEY, RESPONSE_KEY, _store, coalesced
+
+
+KEY = 'test'
+
+
+class CountingView(APIView):
+    permission_classes = AllowAny,
+    action = 'list'
+    calls = 0
+    delay = 0
+
+    @coalesced
+    def get(self, request):
+        type(self).calls += 1
+        time.sleep(self.delay)
+        return Response({'calls': type(self).calls}, headers={'X-Total': '3'})
+
+
+@override_settings(
+    RESPONSE_CACHE_ENABLED=True, RESPONSE_CACHE_TTL=5,
+    RESPONSE_CACHE_STALE=30, RESPONSE_COALESCING_WAIT=1,
+    RESPONSE_COALESCING_POLL=0.01,
+)
+class CoalescingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        CountingView.calls = 0
+        CountingView.delay = 0
+        patcher = mock.patch('api.coalescing._key', return_value=KEY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self):
+        return CountingView.as_view()(APIRequestFactory().get('/'))
+
+    def hold_lock(self):
+        # Блокировку держит другой воркер.
+        cache.add(LOCK_KEY.format(KEY), 1, 60)
+
+    def test_miss_then_hit_replays_response(self):
+        first = self.get()
+        second = self.get()
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, {'calls': 1})
+        self.assertEqual(second['X-Total'], '3')
+        self.assertEqual(CountingView.calls, 1)
+        self.assertIsNone(cache.get(LOCK_KEY.format(KEY)))
+
+    def test_stale_response_revalidated_by_first_request(self):
+        with self.settings(RESPONSE_CACHE_TTL=0):
+            self.get()
+            response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data, {'calls': 2})
+        self.assertIsNone(cache.get(LOCK_KEY.format(KEY)))
+
+    def test_stale_response_served_while_revalidating(self):
+        with self.settings(RESPONSE_CACHE_TTL=0):
+            self.get()
+            self.hold_lock()
+            response = self.get()
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertEqual(response.data, {'calls': 1})
+        self.assertEqual(response['X-Total'], '3')
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_waiter_gets_response_of_lock_holder(self):
+        self.hold_lock()
+        threading.Timer(0.1, lambda: _store(
+            KEY, Response({'calls': 'другой воркер'})
+        )).start()
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'COALESCED')
+        self.assertEqual(response.data, {'calls': 'другой воркер'})
+        self.assertEqual(CountingView.calls, 0)
+
+    def test_waiter_computes_after_timeout_and_keeps_foreign_lock(self):
+        self.hold_lock()
+        with self.settings(RESPONSE_COALESCING_WAIT=0.1):
+            response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(CountingView.calls, 1)
+        self.assertEqual(cache.get(LOCK_KEY.format(KEY)), 1)
+        self.assertIsNotNone(cache.get(RESPONSE_KEY.format(KEY)))
+
+    def test_concurrent_requests_computed_once(self):
+        CountingView.delay = 0.2
+        states = []
+        threads = [
+            threading.Thread(target=lambda: states.append(
+                self.get()['X-Cache']
+            )) for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(CountingView.calls, 1)
+        self.assertEqual(
+            sorted(states), ['COALESCED'] * 4 + ['MISS']
+        )
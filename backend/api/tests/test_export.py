@@ -0,0 +1,112 @@
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.export import stream_author_archive
+from recipes.models import Ingredient, Recipe, RecipeIngredients, Tag
+
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+# Несжимаемые байты больше одного блока чтения файла.
+IMAGE = bytes(range(256)) * 300
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class AuthorArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x',
+            first_name='Анна', last_name='Иванова'
+        )
+        cls.author.avatar.save('avatar.png', ContentFile(b'avatar'))
+        cls.other = User.objects.create_user(
+            username='other', email='other@example.com', password='x'
+        )
+        tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        eggs = Ingredient.objects.create(name='яйца', measurement_unit='шт')
+        cls.recipes = []
+        for number in range(3):
+            recipe = Recipe(
+                author=cls.author, name=f'Омлет {number}', text='Взбить',
+                cooking_time=10
+            )
+            recipe.image.save(f'{number}.png', ContentFile(IMAGE), save=False)
+            recipe.save()
+            recipe.tags.set([tag])
+            RecipeIngredients.objects.create(
+                recipe=recipe, ingredient=eggs, amount=number + 1
+            )
+            cls.recipes.append(recipe)
+        # Файл картинки пропал с диска: рецепт выгружается без неё.
+        cls.recipes[2].image.storage.delete(cls.recipes[2].image.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def read(self, chunks):
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        self.assertIsNone(archive.testzip())
+        return archive
+
+    def test_archive_read_back(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.get(f'/api/users/{self.author.pk}/recipes_export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn(
+            f'recipes-{self.author.pk}.zip', response['Content-Disposition']
+        )
+        archive = self.read(response.streaming_content)
+        first, _, missing = self.recipes
+        self.assertEqual(sorted(archive.namelist()), sorted([
+            'author.json', 'avatar.png',
+            *(f'recipes/{recipe.pk}/recipe.json' for recipe in self.recipes),
+            f'recipes/{first.pk}/image.png',
+            f'recipes/{self.recipes[1].pk}/image.png',
+        ]))
+        self.assertEqual(json.loads(archive.read('author.json')), {
+            'id': self.author.pk, 'username': 'author', 'first_name': 'Анна',
+            'last_name': 'Иванова', 'avatar': 'avatar.png',
+        })
+        self.assertEqual(archive.read('avatar.png'), b'avatar')
+        self.assertEqual(
+            archive.read(f'recipes/{first.pk}/image.png'), IMAGE
+        )
+        metadata = json.loads(archive.read(f'recipes/{first.pk}/recipe.json'))
+        self.assertEqual(metadata['name'], 'Омлет 0')
+        self.assertEqual(metadata['image'], f'recipes/{first.pk}/image.png')
+        self.assertEqual(
+            metadata['tags'], [{'name': 'Завтрак', 'slug': 'breakfast'}]
+        )
+        self.assertEqual(metadata['ingredients'], [
+            {'name': 'яйца', 'measurement_unit': 'шт', 'amount': 1}
+        ])
+        self.assertIsNone(json.loads(
+            archive.read(f'recipes/{missing.pk}/recipe.json')
+        )['image'])
+
+    def test_archive_streamed_in_chunks(self):
+        chunks = list(stream_author_archive(self.author, chunk_size=1))
+        self.assertGreater(len(chunks), len(self.recipes))
+        self.assertLess(max(map(len, chunks)), len(IMAGE))
+        self.assertEqual(len(self.read(chunks).namelist()), 7)
+
+    def test_export_forbidden_for_other_users(self):
+        client = APIClient()
+        client.force_authenticate(self.other)
+        response = client.get(f'/api/users/{self.author.pk}/recipes_export/')
+        self.assertEqual(response.status_code, 403)
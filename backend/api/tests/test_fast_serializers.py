@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Favorite, Ingredient, Recipe, RecipeIngredients, ShoppingCart,
+    SimilarRecipe, Subscribe, Tag
+)
+
+
+User = get_user_model()
+
+
+class FastSerializersTests(TestCase):
+    # Быстрые сериализаторы должны отдавать те же байты, что и DRF.
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x',
+            first_name='Анна', last_name='Повар', avatar='users/author.png'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='x',
+            first_name='Иван', last_name='Читатель'
+        )
+        tags = [
+            Tag.objects.create(name=name, slug=slug)
+            for name, slug in (('Завтрак', 'breakfast'), ('Ужин', 'dinner'))
+        ]
+        ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit=unit)
+            for name, unit in (
+                ('мука', 'г'), ('молоко', 'мл'), ('яйца', 'шт'),
+            )
+        ]
+        cls.recipes = []
+        for number in range(1, 4):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}',
+                text=f'Описание {number}', cooking_time=number * 10,
+                image=f'recipes/recipes/{number}.png'
+            )
+            recipe.tags.set(tags[:number % 2 + 1])
+            RecipeIngredients.objects.bulk_create(
+                RecipeIngredients(
+                    recipe=recipe, ingredient=ingredient,
+                    amount=number * 100 + index
+                ) for index, ingredient in enumerate(ingredients[:number])
+            )
+            cls.recipes.append(recipe)
+        first, second, third = cls.recipes
+        Favorite.objects.create(user=cls.reader, recipe=first)
+        ShoppingCart.objects.create(user=cls.reader, recipe=second)
+        Subscribe.objects.create(user=cls.reader, subscribing=cls.author)
+        SimilarRecipe.objects.all().delete()
+        SimilarRecipe.objects.bulk_create(
+            SimilarRecipe(
+                recipe=first, similar=similar, score=score,
+                computed_at=timezone.now()
+            ) for similar, score in ((third, 0.9), (second, 0.5))
+        )
+
+    def get_both(self, path, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        responses = []
+        for fast in (False, True):
+            with override_settings(FAST_READ_SERIALIZERS=fast):
+                response = client.get(path)
+            self.assertEqual(response.status_code, 200, response.content)
+            responses.append(response.content)
+        return responses
+
+    def assert_same(self, path, user=None):
+        slow, fast = self.get_both(path, user)
+        self.assertEqual(fast, slow)
+
+    def test_recipe_list(self):
+        for user in (None, self.reader):
+            with self.subTest(user=user):
+                self.assert_same('/api/recipes/', user)
+
+    def test_recipe_list_with_fieldset(self):
+        for query in (
+            'fields=id,name,author', 'fields=tags,ingredients',
+            'expand=author', 'fields=name,is_favorited&expand=tags',
+        ):
+            with self.subTest(query=query):
+                self.assert_same(f'/api/recipes/?{query}', self.reader)
+
+    def test_recipe_detail(self):
+        for user in (None, self.reader):
+            with self.subTest(user=user):
+                self.assert_same(f'/api/recipes/{self.recipes[0].pk}/', user)
+
+    def test_similar_recipes(self):
+        slow, fast = self.get_both(
+            f'/api/recipes/{self.recipes[0].pk}/similar/'
+        )
+        self.assertEqual(fast, slow)
+        self.assertIn('Рецепт 3'.encode(), fast)
+
+    def test_ingredients(self):
+        for path in ('/api/ingredients/', '/api/ingredients/?name=мо'):
+            with self.subTest(path=path):
+                self.assert_same(path)
+
+    def test_tags(self):
+        self.assert_same('/api/tags/')
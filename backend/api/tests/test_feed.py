@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .utils import run_tasks
+from recipes.models import FeedEntry, Recipe, Subscribe
+
+
+User = get_user_model()
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=2, FEED_BACKFILL_SIZE=2)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user('author')
+        cls.readers = [
+            cls.create_user(f'reader{number}') for number in range(3)
+        ]
+
+    @classmethod
+    def create_user(cls, username):
+        return User.objects.create_user(
+            username=username, email=f'{username}@example.com', password='x'
+        )
+
+    def publish(self, name='Рецепт'):
+        return Recipe.objects.create(
+            author=self.author, name=name, text='-', cooking_time=5,
+            image='recipes/recipes/1.png'
+        ).pk
+
+    def subscribe(self, *readers):
+        for reader in readers:
+            Subscribe.objects.create(user=reader, subscribing=self.author)
+        run_tasks()
+
+    def entries(self, reader):
+        return list(FeedEntry.objects.filter(user=reader).order_by(
+            '-pub_date', '-recipe_id'
+        ).values_list('recipe_id', flat=True))
+
+    def feed(self, reader):
+        client = APIClient()
+        client.force_authenticate(reader)
+        response = client.get('/api/recipes/feed/')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_recipe_fanned_out_to_followers(self):
+        self.subscribe(*self.readers[:2])
+        recipe_id = self.publish()
+        run_tasks()
+        for reader in self.readers[:2]:
+            self.assertEqual(self.entries(reader), [recipe_id])
+            self.assertEqual(self.feed(reader), [recipe_id])
+        self.assertEqual(self.feed(self.readers[2]), [])
+
+    def test_new_follower_backfilled_with_latest_recipes(self):
+        recipe_ids = [self.publish(f'Рецепт {number}') for number in range(3)]
+        run_tasks()
+        self.subscribe(self.readers[0])
+        self.assertEqual(self.entries(self.readers[0]), recipe_ids[:0:-1])
+
+    def test_popular_author_read_without_fan_out(self):
+        self.subscribe(*self.readers)
+        recipe_id = self.publish()
+        run_tasks()
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed(self.readers[0]), [recipe_id])
+
+    def test_unsubscribe_prunes_feed(self):
+        self.subscribe(self.readers[0])
+        self.publish()
+        run_tasks()
+        Subscribe.objects.filter(user=self.readers[0]).delete()
+        run_tasks()
+        self.assertEqual(self.entries(self.readers[0]), [])
+        self.assertEqual(self.feed(self.readers[0]), [])
+
+    def test_followers_backfilled_below_threshold(self):
+        self.subscribe(*self.readers)
+        recipe_ids = [self.publish(f'Рецепт {number}') for number in range(3)]
+        run_tasks()
+        Subscribe.objects.filter(user=self.readers[2]).delete()
+        self.assertIn(
+            ('recipes.tasks.backfill_author', 'done'), run_tasks()
+        )
+        for reader in self.readers[:2]:
+            self.assertEqual(self.entries(reader), recipe_ids[:0:-1])
+        self.assertEqual(self.entries(self.readers[2]), [])
@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Tag
+from recipes.pantry import pantry_index
+
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+
+# Индекс перепроверяет версию на каждом запросе. Сброс через on_commit
+# в TestCase не срабатывает, так что правку видно только по версии в базе,
+# как в другом воркере.
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PANTRY_INDEX_REBUILD_INTERVAL=-1)
+class PantryIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.eggs, cls.milk, cls.flour = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('яйца', 'молоко', 'мука')
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        pantry_index.refresh()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def save(self, ingredients, recipe_id=None):
+        data = {
+            'name': 'Омлет', 'text': '-', 'cooking_time': 10,
+            'image': IMAGE, 'tags': [self.tag.id],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 1}
+                for ingredient in ingredients
+            ],
+        }
+        if recipe_id is None:
+            response = self.client.post('/api/recipes/', data, format='json')
+        else:
+            response = self.client.patch(
+                f'/api/recipes/{recipe_id}/', data, format='json'
+            )
+        self.assertIn(response.status_code, (200, 201), response.content)
+        return response.json()['id']
+
+    def match(self, *ingredients):
+        response = self.client.get('/api/recipes/pantry/', {
+            'ingredients': ','.join(str(item.id) for item in ingredients)
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        return [
+            (recipe['id'], recipe['matched'], recipe['missing'])
+            for recipe in response.json()['results']
+        ]
+
+    def test_created_and_edited_recipe_rematched(self):
+        recipe_id = self.save([self.eggs, self.milk])
+        self.assertEqual(self.match(self.eggs), [(recipe_id, 1, 1)])
+        self.save([self.flour], recipe_id)
+        self.assertEqual(self.match(self.eggs), [])
+        self.assertEqual(self.match(self.flour), [(recipe_id, 1, 0)])
+
+    def test_ingredient_change_without_recipe_save_detected(self):
+        recipe_id = self.save([self.eggs])
+        self.match(self.eggs)
+        Ingredient.objects.filter(pk=self.eggs.pk).delete()
+        self.assertEqual(self.match(self.eggs), [])
+        self.assertEqual(self.match(self.milk), [])
+        self.save([self.milk], recipe_id)
+        self.assertEqual(self.match(self.milk), [(recipe_id, 1, 0)])
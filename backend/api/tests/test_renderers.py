@@ -0,0 +1,68 @@
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, orjson
+
+
+PAYLOADS = {
+    'scalars': [None, True, False, 0, -17, 2 ** 53, 'строка', ''],
+    'nested': {'results': [{'id': 1, 'tags': [{'slug': 'breakfast'}]}]},
+    'separators': {'text': 'строка\u2028абзац\u2029конец', 'quote': '"\\'},
+    'int keys': {1: 'a', 2: {3: 'b'}},
+    'big int': {'value': 2 ** 70},
+    'floats': [0.1, -2.5, 123.456, 1e15, 100.0, -0.0, 0.0001],
+    'exponent floats': [1e16, 1.5e-05, -2.5e-300, 1.7976931348623157e308],
+    'exponent-like strings': {'id': '3e4f-1e5', 'amount': '0.00001'},
+    'decimals': [Decimal('1.10'), Decimal('0.000015')],
+    'datetimes': [
+        datetime(2026, 10, 19, 8, 5, 12, 123456, tzinfo=timezone.utc),
+        datetime(2026, 10, 19, 8, 5, 12, tzinfo=timezone(timedelta(hours=3))),
+        datetime(2026, 10, 19, 8, 5, 12, 999),
+        date(2026, 10, 19), time(8, 5, 12, 123456),
+    ],
+    'other types': [
+        uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        gettext_lazy('Рецепт'), (1, 2), timedelta(seconds=90),
+    ],
+}
+
+
+@skipIf(orjson is None, 'orjson не установлен')
+class FastJSONRendererTests(SimpleTestCase):
+    def test_output_matches_json_renderer(self):
+        for name, payload in PAYLOADS.items():
+            with self.subTest(payload=name):
+                self.assertEqual(
+                    FastJSONRenderer().render(payload),
+                    JSONRenderer().render(payload)
+                )
+
+    def test_plain_payload_is_rendered_by_orjson(self):
+        with mock.patch.object(
+            JSONRenderer, 'render', side_effect=AssertionError
+        ):
+            for name in ('nested', 'separators', 'datetimes', 'floats'):
+                with self.subTest(payload=name):
+                    FastJSONRenderer().render(PAYLOADS[name])
+
+    def test_non_finite_numbers_rejected_in_strict_mode(self):
+        for value in (
+            float('nan'), float('inf'), -float('inf'), Decimal('NaN')
+        ):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render({'score': [None, value]})
+
+    def test_non_finite_numbers_match_non_strict_renderer(self):
+        payload = {'score': [None, float('nan'), float('inf')]}
+        with mock.patch.object(JSONRenderer, 'strict', False):
+            self.assertEqual(
+                FastJSONRenderer().render(payload),
+                JSONRenderer().render(payload)
+            )
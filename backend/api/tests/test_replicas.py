@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, router
+from django.test import TestCase, override_settings
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from foodgram_backend.db.replicas import (
+    PIN_COOKIE, ReplicaPinningMiddleware, ReplicaReadMixin, use_replicas
+)
+from recipes.models import Recipe
+
+
+REPLICAS = ['replica_1', 'replica_2']
+
+User = get_user_model()
+
+
+class ReadAliasesView(ReplicaReadMixin, APIView):
+    # Отвечает базами, в которые ушли бы чтения за время запроса.
+    permission_classes = AllowAny,
+
+    def get(self, request):
+        return Response([router.db_for_read(Recipe) for _ in range(20)])
+
+    post = get
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='x'
+        )
+        cls.other = User.objects.create_user(
+            username='other', email='other@example.com', password='x'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.handler = ReplicaPinningMiddleware(ReadAliasesView.as_view())
+
+    def request(self, method='get', user=None, cookies=None):
+        request = getattr(self.factory, method)('/')
+        request.COOKIES.update(cookies or {})
+        if user is not None:
+            force_authenticate(request, user)
+        return self.handler(request)
+
+    def test_request_reads_from_one_replica(self):
+        aliases = set(self.request().data)
+        self.assertEqual(len(aliases), 1)
+        self.assertIn(aliases.pop(), REPLICAS)
+
+    def test_requests_spread_over_replicas(self):
+        self.assertEqual(
+            {self.request().data[0] for _ in range(50)}, set(REPLICAS)
+        )
+
+    def test_reads_outside_views_use_primary(self):
+        self.assertEqual(router.db_for_read(Recipe), DEFAULT_DB_ALIAS)
+        with use_replicas(False):
+            self.assertEqual(router.db_for_read(Recipe), DEFAULT_DB_ALIAS)
+        with use_replicas():
+            self.assertIn(router.db_for_read(Recipe), REPLICAS)
+        self.assertEqual(router.db_for_write(Recipe), DEFAULT_DB_ALIAS)
+
+    def test_unsafe_request_uses_primary(self):
+        self.assertEqual(
+            set(self.request('post', self.user).data), {DEFAULT_DB_ALIAS}
+        )
+
+    def test_write_pins_token_client_to_primary(self):
+        self.request('post', self.user)
+        self.assertEqual(
+            set(self.request(user=self.user).data), {DEFAULT_DB_ALIAS}
+        )
+        self.assertIn(self.request(user=self.other).data[0], REPLICAS)
+
+    def test_pin_expires(self):
+        with self.settings(REPLICA_PIN_SECONDS=0):
+            self.request('post', self.user)
+        self.assertIn(self.request(user=self.user).data[0], REPLICAS)
+
+    def test_write_pins_anonymous_client_by_cookie(self):
+        response = self.request('post')
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(
+            set(self.request(cookies={PIN_COOKIE: '1'}).data),
+            {DEFAULT_DB_ALIAS}
+        )
@@ -0,0 +1,120 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Ingredient, Recipe, RecipeIngredients, ShoppingCart
+)
+
+
+User = get_user_model()
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingListETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password='x'
+        )
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+        cls.eggs = Ingredient.objects.create(
+            name='яйца', measurement_unit='шт'
+        )
+        cls.recipe = cls.create_recipe('Омлет', 2)
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipe)
+
+    @classmethod
+    def create_recipe(cls, name, amount):
+        recipe = Recipe.objects.create(
+            author=cls.author, name=name, text='-', cooking_time=5,
+            image='recipes/recipes/1.png'
+        )
+        RecipeIngredients.objects.create(
+            recipe=recipe, ingredient=cls.eggs, amount=amount
+        )
+        return recipe
+
+    def setUp(self):
+        caches['exports'].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self, etag=None):
+        headers = {} if etag is None else {'HTTP_IF_NONE_MATCH': etag}
+        return self.client.get(URL, **headers)
+
+    def assertChanges(self, change):
+        etag = self.download()['ETag']
+        change()
+        response = self.download(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return b''.join(response.streaming_content).decode()
+
+    def test_unchanged_list_not_modified(self):
+        response = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertIn(
+            '1. Яйца: 2 шт', b''.join(response.streaming_content).decode()
+        )
+        response = self.download(response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertTrue(response['ETag'])
+
+    def test_rendered_list_cached(self):
+        self.download()
+        with mock.patch('api.shopping_list._render') as render:
+            self.download()
+        render.assert_not_called()
+
+    def test_cart_change_invalidates(self):
+        content = self.assertChanges(lambda: ShoppingCart.objects.create(
+            user=self.user, recipe=self.create_recipe('Яичница', 3)
+        ))
+        self.assertIn('1. Яйца: 5 шт', content)
+
+    def test_recipe_edit_invalidates(self):
+        def edit():
+            RecipeIngredients.objects.filter(recipe=self.recipe).update(
+                amount=7
+            )
+            self.recipe.save()
+
+        self.assertIn('1. Яйца: 7 шт', self.assertChanges(edit))
+
+    def test_ingredient_rename_invalidates(self):
+        def rename():
+            self.eggs.name = 'перепелиные яйца'
+            self.eggs.save()
+
+        self.assertIn('1. Перепелиные яйца', self.assertChanges(rename))
+
+    def test_author_rename_invalidates(self):
+        def rename():
+            self.author.username = 'chef'
+            self.author.save()
+
+        self.assertIn('@chef', self.assertChanges(rename))
+
+    def test_new_day_invalidates(self):
+        etag = self.download()['ETag']
+        with mock.patch('api.shopping_list.date') as today:
+            today.today.return_value = date(2100, 1, 1)
+            self.assertEqual(self.download(etag).status_code, 200)
+
+    def test_etag_is_per_user(self):
+        etag = self.download()['ETag']
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='x'
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.download(etag).status_code, 200)
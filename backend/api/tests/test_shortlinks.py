@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from recipes.models import Recipe
+from recipes.shortlinks import (
+    ALPHABET, CODE_LENGTH, MASK, decode_short_code, encode_short_code,
+    live_recipe_ids, recipe_exists
+)
+
+
+User = get_user_model()
+
+
+class ShortCodeTests(SimpleTestCase):
+    def test_round_trip(self):
+        for pk in (1, 2, 61, 62, 1000, 2 ** 20, 2 ** 32, MASK):
+            with self.subTest(pk=pk):
+                code = encode_short_code(pk)
+                self.assertEqual(len(code), CODE_LENGTH)
+                self.assertTrue(code[0].isalpha())
+                self.assertEqual(decode_short_code(code), pk)
+
+    def test_no_collisions_for_sequential_ids(self):
+        codes = {encode_short_code(pk) for pk in range(1, 100_001)}
+        self.assertEqual(len(codes), 100_000)
+
+    def test_sequential_ids_give_unrelated_codes(self):
+        first, second = encode_short_code(1), encode_short_code(2)
+        self.assertGreater(
+            sum(a != b for a, b in zip(first, second)), CODE_LENGTH // 2
+        )
+
+    def test_codes_depend_on_secret_key(self):
+        code = encode_short_code(42)
+        with self.settings(SECRET_KEY='другой ключ'):
+            self.assertNotEqual(encode_short_code(42), code)
+            self.assertNotEqual(decode_short_code(code), 42)
+
+    def test_ids_beyond_40_bits_stay_numeric(self):
+        self.assertEqual(encode_short_code(MASK + 1), str(MASK + 1))
+        self.assertEqual(decode_short_code(str(MASK + 1)), MASK + 1)
+
+    def test_invalid_codes_rejected(self):
+        # Последняя буква алфавита: значение больше 40 бит.
+        too_big = ALPHABET[51] * CODE_LENGTH
+        for code in ('abc', 'abcdefgh', 'abc-def', 'абвгдеё', too_big):
+            with self.subTest(code=code):
+                self.assertIsNone(decode_short_code(code))
+
+
+class RecipeExistsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+
+    def setUp(self):
+        cache.clear()
+        live_recipe_ids.refresh()
+
+    def create(self):
+        return Recipe.objects.create(
+            author=self.author, name='Рецепт', text='-', cooking_time=5,
+            image='recipes/recipes/1.png'
+        )
+
+    def test_created_recipe_found_without_queries(self):
+        recipe = self.create()
+        with self.assertNumQueries(0):
+            self.assertTrue(recipe_exists(recipe.pk))
+
+    def test_deleted_recipe_not_found(self):
+        recipe = self.create()
+        pk = recipe.pk
+        recipe.delete()
+        self.assertFalse(recipe_exists(pk))
+
+    def test_missing_bit_checked_in_database_once(self):
+        recipe = self.create()
+        # Рецепт создан другим воркером: бита в этом процессе нет.
+        live_recipe_ids.discard(recipe.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(recipe_exists(recipe.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(recipe_exists(recipe.pk))
+
+    def test_unknown_id_cached_as_missing(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(recipe_exists(10 ** 9))
+        with self.assertNumQueries(0):
+            self.assertFalse(recipe_exists(10 ** 9))
+
+    def test_bitmap_rebuilt_after_refresh_interval(self):
+        recipe = self.create()
+        live_recipe_ids.discard(recipe.pk)
+        with self.settings(SHORT_LINK_REFRESH_SECONDS=-1):
+            self.assertIn(recipe.pk, live_recipe_ids)
+
+    def test_redirect(self):
+        recipe = self.create()
+        code = encode_short_code(recipe.pk)
+        self.assertRedirects(
+            self.client.get(f'/s/{code}/'), f'/recipes/{recipe.pk}',
+            fetch_redirect_response=False
+        )
+        self.assertEqual(self.client.get(f'/s/{recipe.pk}/').status_code, 302)
+        recipe.delete()
+        response = self.client.get(f'/s/{code}/')
+        self.assertEqual(response.status_code, 404)
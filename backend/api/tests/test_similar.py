@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from .utils import run_tasks
+from recipes.models import Ingredient, Recipe, RecipeIngredients, SimilarRecipe
+
+
+User = get_user_model()
+
+
+class SimilarRecipesTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+        ingredients = [
+            Ingredient.objects.create(name=f'продукт {number}',
+                                      measurement_unit='г')
+            for number in range(12)
+        ]
+        # У base 12 продуктов, у recipes[k] — первые k + 1 из них:
+        # сходство с base растёт с номером рецепта.
+        self.base, *self.recipes = [
+            self.create(author, ingredients[:count])
+            for count in (12, *range(1, 13))
+        ]
+        run_tasks()
+
+    def create(self, author, ingredients):
+        recipe = Recipe.objects.create(
+            author=author, name=f'Рецепт {len(ingredients)}', text='-',
+            cooking_time=5, image='recipes/recipes/1.png'
+        )
+        RecipeIngredients.objects.bulk_create(
+            RecipeIngredients(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients
+        )
+        return recipe
+
+    def similar(self, recipe):
+        return list(SimilarRecipe.objects.filter(recipe=recipe).values_list(
+            'similar_id', flat=True
+        ))
+
+    def ids(self, recipes):
+        return [recipe.pk for recipe in recipes]
+
+    def test_top_neighbours_computed(self):
+        self.assertEqual(
+            self.similar(self.base), self.ids(self.recipes[:1:-1])
+        )
+        response = self.client.get(f'/api/recipes/{self.base.pk}/similar/')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()],
+            self.ids(self.recipes[:1:-1])
+        )
+
+    def test_neighbour_deletion_refills_top(self):
+        self.recipes[-1].delete()
+        # Соседство с удалённым ушло каскадом, место пустует до пересчёта.
+        self.assertEqual(len(self.similar(self.base)), 9)
+        self.assertIn(
+            ('recipes.tasks.recompute_similar_recipes', 'done'), run_tasks()
+        )
+        self.assertEqual(
+            self.similar(self.base), self.ids(self.recipes[-2:0:-1])
+        )
+
+    def test_unrelated_deletion_keeps_neighbours(self):
+        before = self.similar(self.recipes[-1])
+        Recipe.objects.create(
+            author=self.base.author, name='Без состава', text='-',
+            cooking_time=5, image='recipes/recipes/1.png'
+        ).delete()
+        run_tasks()
+        self.assertEqual(self.similar(self.recipes[-1]), before)
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, Subscribe
+
+
+User = get_user_model()
+
+
+class SubscriptionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='x'
+        )
+        cls.recipes = {}
+        for number, count in enumerate((3, 1, 0)):
+            author = User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com', password='x'
+            )
+            cls.recipes[author.username] = [
+                Recipe.objects.create(
+                    author=author, name=f'Рецепт {index}', text='-',
+                    cooking_time=5, image='recipes/recipes/1.png'
+                ).id for index in range(count)
+            ][::-1]
+            Subscribe.objects.create(user=cls.reader, subscribing=author)
+        cls.other = User.objects.create_user(
+            username='other', email='other@example.com', password='x'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def subscriptions(self, query=''):
+        response = self.client.get(f'/api/users/subscriptions/{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return {
+            author['username']: (
+                author['recipes_count'],
+                [recipe['id'] for recipe in author['recipes']]
+            )
+            for author in response.json()['results']
+        }
+
+    def test_recipes_limited_per_author(self):
+        for limit in (0, 2, 10):
+            with self.subTest(limit=limit):
+                self.assertEqual(
+                    self.subscriptions(f'?recipes_limit={limit}'), {
+                        username: (len(ids), ids[:limit])
+                        for username, ids in self.recipes.items()
+                    }
+                )
+
+    def test_queries_do_not_grow_with_authors(self):
+        self.subscriptions()
+        # Число авторов, страница авторов и их рецепты.
+        with self.assertNumQueries(3):
+            self.subscriptions('?limit=1')
+        with self.assertNumQueries(3):
+            self.subscriptions()
+
+    def test_subscribe_returns_recipes_count(self):
+        response = self.client.post(f'/api/users/{self.other.id}/subscribe/')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['recipes_count'], 0)
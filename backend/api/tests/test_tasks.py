@@ -0,0 +1,144 @@
+import threading
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import (
+    TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+)
+from django.utils import timezone
+
+from tasks.models import FAILED, QUEUED, RUNNING, Task
+from tasks.queue import (
+    TASK_TIMED_OUT, UNKNOWN_TASK, claim, enqueue, requeue_stale, run, task
+)
+
+
+calls = []
+
+
+@task(priority=5)
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=3)
+def explode():
+    raise RuntimeError('сломалось')
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_eager_mode_runs_inline(self):
+        with override_settings(TASKS_EAGER=True):
+            enqueue(record, value=1)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_enqueue_waits_for_worker(self):
+        enqueue(record, value=1)
+        self.assertEqual(calls, [])
+        claimed = claim()
+        self.assertEqual((claimed.status, claimed.attempts), (RUNNING, 1))
+        self.assertEqual(run(claimed), 'done')
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_unique_enqueue_deduplicates(self):
+        enqueue(record, unique=True, value=1)
+        enqueue(record, unique=True, value=1)
+        enqueue(record, unique=True, value=2)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_claim_order_and_delay(self):
+        enqueue(record, priority=0, value='low')
+        enqueue(record, value='high')
+        enqueue(record, delay=60, priority=10, value='later')
+        first, second = claim(), claim()
+        self.assertEqual(first.kwargs, {'value': 'high'})
+        self.assertEqual(second.kwargs, {'value': 'low'})
+        self.assertIsNone(claim())
+
+    def test_retry_with_backoff_then_fail(self):
+        enqueue(explode)
+        for attempt, delay in ((1, 10), (2, 20)):
+            with self.subTest(attempt=attempt):
+                started = timezone.now()
+                claimed = claim()
+                self.assertEqual(claimed.attempts, attempt)
+                with self.settings(TASKS_RETRY_DELAY=10), self.assertLogs(
+                    'foodgram.tasks', 'ERROR'
+                ):
+                    self.assertEqual(run(claimed), 'retried')
+                claimed.refresh_from_db()
+                self.assertEqual(claimed.status, QUEUED)
+                self.assertIn('сломалось', claimed.error)
+                self.assertGreaterEqual(
+                    claimed.run_after, started + timedelta(seconds=delay)
+                )
+                self.assertIsNone(claim())
+                Task.objects.update(run_after=timezone.now())
+        with self.assertLogs('foodgram.tasks', 'ERROR'):
+            self.assertEqual(run(claim()), 'failed')
+        self.assertEqual(Task.objects.get().status, FAILED)
+
+    def test_unknown_task_fails_without_retry(self):
+        Task.objects.create(name='tasks.missing', max_attempts=3)
+        with self.assertLogs('foodgram.tasks', 'ERROR'):
+            self.assertEqual(run(claim()), 'failed')
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, FAILED)
+        self.assertIn(UNKNOWN_TASK.format('tasks.missing'), failed.error)
+
+    def test_stale_tasks_requeued_until_attempts_run_out(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        retried = Task.objects.create(
+            name=record.task_name, status=RUNNING, attempts=1,
+            max_attempts=3, started_at=long_ago
+        )
+        exhausted = Task.objects.create(
+            name=record.task_name, status=RUNNING, attempts=3,
+            max_attempts=3, started_at=long_ago
+        )
+        fresh = Task.objects.create(
+            name=record.task_name, status=RUNNING, attempts=3,
+            max_attempts=3, started_at=timezone.now()
+        )
+        with self.settings(TASKS_TIMEOUT=60), self.assertLogs(
+            'foodgram.tasks', 'ERROR'
+        ):
+            self.assertEqual(requeue_stale(), 1)
+        for instance, status in (
+            (retried, QUEUED), (exhausted, FAILED), (fresh, RUNNING),
+        ):
+            instance.refresh_from_db()
+            self.assertEqual(instance.status, status)
+        self.assertEqual(exhausted.error, TASK_TIMED_OUT)
+
+
+class SkipLockedTests(TransactionTestCase):
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_locked_task_is_skipped(self):
+        enqueue(record, value='locked')
+        enqueue(record, priority=0, value='free')
+        locked, release = threading.Event(), threading.Event()
+
+        def hold():
+            # Другой воркер держит первую задачу в своей транзакции.
+            with transaction.atomic():
+                Task.objects.select_for_update().filter(
+                    kwargs={'value': 'locked'}
+                ).get()
+                locked.set()
+                release.wait(5)
+            connection.close()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        try:
+            locked.wait(5)
+            self.assertEqual(claim().kwargs, {'value': 'free'})
+        finally:
+            release.set()
+            thread.join()
@@ -0,0 +1,153 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from api.pagination import LimitPageNumberPagination
+from api.throttling import CostThrottle
+from recipes.models import Recipe, Subscribe
+
+
+User = get_user_model()
+
+
+class CheapView(APIView):
+    permission_classes = AllowAny,
+    throttle_classes = CostThrottle,
+
+    def get(self, request):
+        return Response()
+
+
+class CostlyView(CheapView):
+    pass
+
+
+@override_settings(
+    THROTTLE_ENABLED=True, THROTTLE_CACHE='default',
+    THROTTLE_IP_BUCKET=(4, 1.0), THROTTLE_USER_BUCKET=(100, 1.0),
+    THROTTLE_COSTS={'CostlyView': 3},
+)
+class CostThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password='x'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.now = 1000.0
+        patcher = mock.patch('api.throttling.time')
+        patcher.start().time.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+        self.factory = APIRequestFactory()
+
+    def get(self, view=CheapView, forwarded_for='10.0.0.1', user=None):
+        request = self.factory.get('/', HTTP_X_FORWARDED_FOR=forwarded_for)
+        if user is not None:
+            request.user = user
+            request._force_auth_user = user
+        return view.as_view()(request)
+
+    def statuses(self, count, **kwargs):
+        return [self.get(**kwargs).status_code for _ in range(count)]
+
+    def test_bucket_empties_and_sets_retry_after(self):
+        self.assertEqual(self.statuses(4), [200] * 4)
+        response = self.get()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_bucket_refills_over_time(self):
+        self.statuses(4)
+        self.now += 2
+        self.assertEqual(self.statuses(3), [200, 200, 429])
+
+    def test_cost_weighting(self):
+        self.assertEqual(self.statuses(2, view=CostlyView), [200, 429])
+        self.assertEqual(self.statuses(2), [200, 429])
+        self.now += 2
+        self.assertEqual(self.get(view=CostlyView)['Retry-After'], '1')
+
+    def test_clients_are_told_apart_by_forwarded_address(self):
+        self.statuses(4, forwarded_for='10.0.0.1')
+        self.assertEqual(self.get(forwarded_for='10.0.0.2').status_code, 200)
+
+    def test_spoofed_forwarded_entries_are_ignored(self):
+        # С NUM_PROXIES=1 адрес клиента — последний, дописанный шлюзом.
+        for spoofed in ('1.1.1.1', '2.2.2.2', '3.3.3.3', '4.4.4.4'):
+            self.get(forwarded_for=f'{spoofed}, 10.0.0.1')
+        self.assertEqual(
+            self.get(forwarded_for='5.5.5.5, 10.0.0.1').status_code, 429
+        )
+
+    def test_rejected_request_does_not_charge_user_bucket(self):
+        self.statuses(4, forwarded_for='10.0.0.1')
+        with self.settings(THROTTLE_USER_BUCKET=(4, 1.0)):
+            self.assertEqual(
+                self.statuses(3, forwarded_for='10.0.0.1', user=self.user),
+                [429] * 3
+            )
+            self.assertEqual(
+                self.statuses(5, forwarded_for='10.0.0.2', user=self.user),
+                [200] * 4 + [429]
+            )
+
+    def test_disabled_throttle_allows_everything(self):
+        with self.settings(THROTTLE_ENABLED=False):
+            self.assertEqual(self.statuses(10), [200] * 10)
+
+
+@override_settings(RECIPES_LIMIT_MAX=2)
+class RecipesLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='x'
+        )
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=cls.author, name=f'Рецепт {number}', text='-',
+                cooking_time=5, image='recipes/recipes/1.png'
+            ) for number in range(3)
+        )
+        Subscribe.objects.create(user=cls.reader, subscribing=cls.author)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def recipes(self, query=''):
+        response = self.client.get(f'/api/users/subscriptions/{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        author = response.json()['results'][0]
+        self.assertEqual(author['recipes_count'], 3)
+        return author['recipes']
+
+    def test_recipes_limit_is_capped(self):
+        self.assertEqual(len(self.recipes()), 2)
+        self.assertEqual(len(self.recipes('?recipes_limit=1000')), 2)
+        self.assertEqual(len(self.recipes('?recipes_limit=1')), 1)
+
+    def test_invalid_recipes_limit_rejected(self):
+        for value in ('abc', '-1', '1.5'):
+            with self.subTest(value=value):
+                response = self.client.get(
+                    f'/api/users/subscriptions/?recipes_limit={value}'
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('recipes_limit', response.json())
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(LimitPageNumberPagination, 'max_page_size', 1):
+            response = self.client.get('/api/users/?limit=1000')
+        self.assertEqual(len(response.json()['results']), 1)
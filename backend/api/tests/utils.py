@@ -0,0 +1,15 @@
+from django.utils import timezone
+
+from tasks.models import QUEUED, Task
+from tasks.queue import claim, run
+
+
+def run_tasks():
+    # Воркер в режиме --burst, не дожидаясь отложенных задач.
+    results = []
+    while True:
+        Task.objects.filter(status=QUEUED).update(run_after=timezone.now())
+        claimed = claim()
+        if claimed is None:
+            return results
+        results.append((claimed.name, run(claimed)))
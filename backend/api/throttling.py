@@ -0,0 +1,75 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from foodgram_backend import metrics
+
+
+BUCKET_KEY = 'throttle:{}:{}'
+
+
+def request_cost(view):
+    action = getattr(view, 'action', None)
+    name = type(view).__name__
+    return settings.THROTTLE_COSTS.get(
+        f'{name}.{action}' if action else name, 1
+    )
+
+
+class CostThrottle(BaseThrottle):
+    # Ведро на capacity токенов пополняется со скоростью rate в секунду,
+    # запрос забирает столько токенов, сколько стоит его эндпоинт. Запрос
+    # дороже ведра проходит при полном ведре и уводит баланс в минус.
+    # Токены списываются, только если запрос пропускают все вёдра сразу.
+    lock = threading.Lock()
+
+    def get_buckets(self, request):
+        # Адрес клиента берётся из X-Forwarded-For с учётом NUM_PROXIES:
+        # за шлюзом REMOTE_ADDR у всех клиентов один.
+        buckets = [('ip', self.get_ident(request))]
+        if request.user and request.user.is_authenticated:
+            buckets.append(('user', request.user.pk))
+        return buckets
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        if not settings.THROTTLE_ENABLED:
+            return True
+        cost = request_cost(view)
+        cache = caches[settings.THROTTLE_CACHE]
+        now = time.time()
+        # Между процессами чтение и запись вёдер не атомарны: в гонке
+        # клиент может получить чуть больше запросов, чем положено.
+        with self.lock:
+            states = {}
+            for scope, ident in self.get_buckets(request):
+                capacity, rate = getattr(
+                    settings, f'THROTTLE_{scope.upper()}_BUCKET'
+                )
+                key = BUCKET_KEY.format(scope, ident)
+                tokens, updated_at = cache.get(key, (capacity, now))
+                states[key] = scope, capacity, rate, min(
+                    capacity, tokens + (now - updated_at) * rate
+                )
+            rejected = [
+                (scope, (min(cost, capacity) - tokens) / rate)
+                for scope, capacity, rate, tokens in states.values()
+                if tokens < min(cost, capacity)
+            ]
+            for key, (_, capacity, rate, tokens) in states.items():
+                if not rejected:
+                    tokens -= cost
+                cache.set(
+                    key, (tokens, now), int((capacity - tokens) / rate) + 1
+                )
+        for scope, _ in rejected:
+            metrics.inc('foodgram_throttled_total', scope=scope)
+        if rejected:
+            self.retry_after = max(wait for _, wait in rejected)
+        return not rejected
+
+    def wait(self):
+        return self.retry_after
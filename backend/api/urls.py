@@ -2,7 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    IngredientViewSet, TagViewSet, RecipeViewSet, FoodgramUserViewSet
+    BatchView, IngredientViewSet, MetricsView, TagViewSet, RecipeViewSet,
+    FoodgramUserViewSet
 )
 
 
@@ -15,5 +16,9 @@ router.register('users', FoodgramUserViewSet, basename='user')
 
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('batch/', BatchView.as_view(viewsets=[
+        viewset for _, viewset, _ in router.registry
+    ]), name='batch'),
     path('', include(router.urls)),
 ]
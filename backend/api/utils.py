@@ -1,7 +1,18 @@
 from datetime import date
 
+from django.contrib.auth import get_user_model
+from django.db.models import (
+    BooleanField, Count, Exists, OuterRef, Prefetch, Subquery, Value
+)
+from django.db.models.functions import Coalesce
 from django.utils.formats import date_format
 
+from recipes.models import (
+    Favorite, Recipe, RecipeIngredients, ShoppingCart, Subscribe
+)
+
+
+User = get_user_model()
 
 HEADER_ROW = 'Список продуктов пользователя {} на {}'
 
@@ -11,6 +22,21 @@ RECIPES_ROW = '{} (@{})'
 
 DATE_FORMAT = 'd E Y'
 
+RECIPE_COLUMNS = {
+    'name': 'name',
+    'text': 'text',
+    'cooking_time': 'cooking_time',
+    'image': 'image',
+    'author': 'author',
+}
+
+RECIPE_FLAGS = {
+    'is_favorited': Favorite,
+    'is_in_shopping_cart': ShoppingCart,
+}
+
+RECIPE_EXPANDABLE_FIELDS = 'author', 'tags', 'ingredients'
+
 
 def generate_shopping_list(user, recipes, ingredients):
     return '\n'.join([
@@ -31,3 +57,77 @@ def generate_shopping_list(user, recipes, ingredients):
             recipe.name[:21], recipe.author.username
         ) for recipe in recipes],
     ])
+
+
+def _false():
+    return Value(False, output_field=BooleanField())
+
+
+def annotate_is_subscribed(users, user):
+    if not user.is_authenticated:
+        return users.annotate(is_subscribed=_false())
+    return users.annotate(is_subscribed=Exists(
+        Subscribe.objects.filter(user=user, subscribing=OuterRef('pk'))
+    ))
+
+
+def prefetch_subscribed_recipes(authors, limit):
+    # Число рецептов и первые limit из них — для всей страницы авторов
+    # сразу, а не двумя запросами на каждого. Счётчик — подзапросом:
+    # с GROUP BY пропала бы сортировка из Meta.
+    return authors.annotate(recipes_count=Coalesce(Subquery(
+        Recipe.objects.filter(author=OuterRef('pk')).order_by().values(
+            'author'
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)).prefetch_related(Prefetch(
+        'recipes',
+        queryset=Recipe.objects.filter(pk__in=Subquery(
+            Recipe.objects.filter(
+                author=OuterRef('author')
+            ).values('pk')[:limit]
+        )).only('id', 'author', 'name', 'image', 'cooking_time')
+    ))
+
+
+def annotate_recipe_flags(recipes, user, flags=RECIPE_FLAGS):
+    if not user.is_authenticated:
+        return recipes.annotate(**{flag: _false() for flag in flags})
+    return recipes.annotate(**{
+        flag: Exists(model.objects.filter(user=user, recipe=OuterRef('pk')))
+        for flag, model in RECIPE_FLAGS.items() if flag in flags
+    })
+
+
+def prefetch_for_reading(recipes, user, fieldset=None):
+    # fieldset — пара (поля, раскрываемые поля) из ?fields= и ?expand=:
+    # читаются только нужные столбцы и предзагрузки.
+    if fieldset is None:
+        fields = (*RECIPE_EXPANDABLE_FIELDS, *RECIPE_FLAGS)
+        expand = RECIPE_EXPANDABLE_FIELDS
+    else:
+        fields, expand = fieldset
+        recipes = recipes.only('id', *(
+            RECIPE_COLUMNS[field] for field in fields
+            if field in RECIPE_COLUMNS
+        ))
+    recipes = annotate_recipe_flags(recipes, user, [
+        flag for flag in RECIPE_FLAGS if flag in fields
+    ])
+    lookups = []
+    if 'author' in fields and 'author' in expand:
+        lookups.append(Prefetch(
+            'author',
+            queryset=annotate_is_subscribed(User.objects.all(), user)
+        ))
+    if 'tags' in fields:
+        lookups.append('tags')
+    if 'ingredients' in fields:
+        recipe_ingredients = RecipeIngredients.objects.order_by('pk')
+        if 'ingredients' in expand:
+            recipe_ingredients = recipe_ingredients.select_related(
+                'ingredient'
+            )
+        lookups.append(Prefetch(
+            'recipe_ingredients', queryset=recipe_ingredients
+        ))
+    return recipes.prefetch_related(*lookups)
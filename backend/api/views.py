@@ -1,31 +1,66 @@
+import time
 from datetime import date
+from io import BytesIO
+
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import FileResponse
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+    StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils.formats import date_format
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status, serializers
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import (
-    IsAuthenticatedOrReadOnly, IsAuthenticated
+    SAFE_METHODS, AllowAny, IsAdminUser, IsAuthenticatedOrReadOnly,
+    IsAuthenticated
 )
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet, ModelViewSet
 
-from .filters import LimitFilter, NameFilter, RecipeFilter
+from .batch import run_batch
+from .catalog import catalog_response
+from .coalescing import coalesced
+from .fast_serializers import (
+    ingredients_data, read_recipes_data, recipe_list_data, recipe_list_rows,
+    recipe_rows, tags_data
+)
+from .filters import NameFilter, RecipeFilter
+from .pagination import LimitPageNumberPagination
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (
-    IngredientSerializer, RecipeListSerializer, SubscribedUserSerializer,
-    TagSerializer, ReadRecipeSerializer, UserAvatarSerializer,
-    WriteRecipeSerializer
+    BatchSerializer, IngredientSerializer, PantryRecipeSerializer,
+    RecipeListSerializer, SubscribedUserSerializer, TagSerializer,
+    ReadRecipeSerializer, UserAvatarSerializer, WriteRecipeSerializer,
+    get_recipes_limit
 )
-from .utils import generate_shopping_list
+from .shopping_list import export_etag, get_shopping_list, is_not_modified
+from .utils import (
+    RECIPE_EXPANDABLE_FIELDS, annotate_is_subscribed, prefetch_for_reading,
+    prefetch_subscribed_recipes
+)
+from foodgram_backend import metrics
+from foodgram_backend.db.replicas import ReplicaReadMixin
 from recipes.models import (
-    Favorite, Ingredient, ShoppingCart, Tag, Recipe, Subscribe
+    Favorite, Ingredient, ShoppingCart, SimilarRecipe, Tag, Recipe, Subscribe
+)
+from recipes.changes import (
+    InvalidCursor, decode_cursor, encode_cursor, parse_changed_at,
+    recipe_changes
 )
+from recipes.export import ARCHIVE_FILENAME, stream_author_archive
+from recipes.feed import get_feed
+from recipes.pantry import pantry_index
+from recipes.shortlinks import encode_short_code, recipe_exists
 
 
 User = get_user_model()
@@ -42,22 +77,70 @@ ALREADY_SUBSCRIBED_ERROR = 'Вы уже подписаны на "{}"'
 
 DATE_FORMAT_SHORT = 'd.m.Y'
 
+PANTRY_INGREDIENTS_REQUIRED = {
+    'ingredients': 'Укажите id продуктов через запятую.'
+}
+
+CATALOG_SINCE_INVALID = {
+    'since': 'Укажите версию каталога неотрицательным целым числом.'
+}
+
+EXPORT_FORBIDDEN = 'Выгрузить рецепты может только их автор.'
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+UNKNOWN_FIELDS = 'Неизвестные поля: {}. Допустимы: {}.'
+
+SPARSE_ACTIONS = 'list', 'retrieve', 'feed', 'changes'
+
+INVALID_CHANGES_CURSOR = 'Некорректное значение {}: {}'
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+INVALID_CHANGES_LIMIT = 'Укажите limit целым числом от 1 до {}.'
+
+
+def _split(values):
+    return [
+        value.strip() for raw in values
+        for value in raw.split(',') if value.strip()
+    ]
+
+
+class IngredientViewSet(ReplicaReadMixin, ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = DjangoFilterBackend,
     filterset_class = NameFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            ingredients_data(self.filter_queryset(self.get_queryset()))
+        )
+
+    @action(
+        ['get'], detail=False, url_path='catalog',
+    )
+    def catalog(self, request):
+        since = request.query_params.get('since', '0')
+        if not since.isdigit():
+            raise serializers.ValidationError(CATALOG_SINCE_INVALID)
+        return catalog_response(request, int(since))
+
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(ReplicaReadMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        return Response(tags_data(self.get_queryset()))
 
-class RecipeViewSet(ModelViewSet):
+
+class RecipeViewSet(ReplicaReadMixin, ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly
     filter_backends = DjangoFilterBackend,
@@ -66,11 +149,77 @@ class RecipeViewSet(ModelViewSet):
         'get', 'post', 'patch', 'delete', 'head', 'options', 'trace'
     )
 
+    @cached_property
+    def fieldset(self):
+        params = self.request.query_params
+        if self.action not in SPARSE_ACTIONS or not (
+            'fields' in params or 'expand' in params
+        ):
+            return None
+        fields = _split(params.getlist('fields')) or list(
+            ReadRecipeSerializer.Meta.fields
+        )
+        expand = _split(params.getlist('expand'))
+        errors = {}
+        for param, values, allowed in (
+            ('fields', fields, ReadRecipeSerializer.Meta.fields),
+            ('expand', expand, RECIPE_EXPANDABLE_FIELDS),
+        ):
+            unknown = [value for value in values if value not in allowed]
+            if unknown:
+                errors[param] = UNKNOWN_FIELDS.format(
+                    ', '.join(unknown), ', '.join(allowed)
+                )
+        if errors:
+            raise serializers.ValidationError(errors)
+        if self.action == 'changes':
+            # По id записи ленты изменений сопоставляются с рецептами.
+            fields.append('id')
+        return frozenset(fields) | frozenset(expand), frozenset(expand)
+
+    def get_queryset(self):
+        # Изменения рецепта не должны натыкаться на устаревшие
+        # предзагруженные тэги и продукты.
+        if self.request.method not in SAFE_METHODS:
+            return super().get_queryset()
+        return prefetch_for_reading(
+            super().get_queryset(), self.request.user, self.fieldset
+        )
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'fieldset': self.fieldset}
+
     def get_serializer_class(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'feed', 'changes']:
             return ReadRecipeSerializer
         return WriteRecipeSerializer
 
+    def _read_page(self, recipes):
+        if not settings.FAST_READ_SERIALIZERS:
+            page = self.paginate_queryset(recipes)
+            return self.get_paginated_response(
+                self.get_serializer(page, many=True).data
+            )
+        page = self.paginate_queryset(recipe_rows(recipes, self.fieldset))
+        return self.get_paginated_response(
+            read_recipes_data(page, self.request, self.fieldset)
+        )
+
+    def _read_data(self, recipes):
+        if not settings.FAST_READ_SERIALIZERS:
+            return self.get_serializer(recipes, many=True).data
+        return read_recipes_data(
+            recipe_rows(recipes, self.fieldset), self.request, self.fieldset
+        )
+
+    @coalesced
+    def list(self, request, *args, **kwargs):
+        return self._read_page(self.filter_queryset(self.get_queryset()))
+
+    @coalesced
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
@@ -109,38 +258,176 @@ class RecipeViewSet(ModelViewSet):
         ['get'], detail=True, url_path='get-link',
     )
     def get_link(self, request, pk):
-        if not self.get_queryset().filter(pk=pk).exists():
+        if not pk.isdigit() or not recipe_exists(int(pk)):
             raise serializers.ValidationError(RECIPE_NOT_EXIST.format(pk))
         return Response({
             'short-link': request.build_absolute_uri(
-                reverse('short-link', args=(pk,))
+                reverse('short-link', args=(encode_short_code(int(pk)),))
             )
         })
 
+    @action(
+        ['get'], detail=True, url_path='similar',
+    )
+    def similar(self, request, pk):
+        if not pk.isdigit() or not recipe_exists(int(pk)):
+            raise Http404(RECIPE_NOT_EXIST.format(pk))
+        similar = SimilarRecipe.objects.filter(recipe_id=pk)
+        if not settings.FAST_READ_SERIALIZERS:
+            return Response(RecipeListSerializer(
+                [
+                    similar_recipe.similar for similar_recipe
+                    in similar.select_related('similar')
+                ],
+                many=True, context={'request': request}
+            ).data)
+        # Порядок задаёт сходство, поэтому строки рецептов раскладываются
+        # по списку id.
+        similar_ids = list(similar.values_list('similar_id', flat=True))
+        rows = {
+            row['id']: row for row in recipe_list_rows(
+                Recipe.objects.filter(pk__in=similar_ids)
+            )
+        }
+        return Response(recipe_list_data(
+            [
+                rows[recipe_id] for recipe_id in similar_ids
+                if recipe_id in rows
+            ],
+            request
+        ))
+
+    @action(
+        ['get'], detail=False, url_path='pantry',
+    )
+    def pantry(self, request):
+        try:
+            ingredient_ids = [
+                int(value)
+                for values in request.query_params.getlist('ingredients')
+                for value in values.split(',') if value
+            ]
+        except ValueError:
+            raise serializers.ValidationError(PANTRY_INGREDIENTS_REQUIRED)
+        if not ingredient_ids:
+            raise serializers.ValidationError(PANTRY_INGREDIENTS_REQUIRED)
+        recipe_ids, matched, missing = pantry_index.search(
+            ingredient_ids, request.query_params.getlist('tags')
+        )
+        positions = self.paginate_queryset(range(len(recipe_ids)))
+        page_ids = recipe_ids[positions].tolist()
+        recipes = self.get_queryset().in_bulk(page_ids)
+        return self.get_paginated_response(PantryRecipeSerializer(
+            [recipes[pk] for pk in page_ids if pk in recipes],
+            many=True,
+            context={
+                **self.get_serializer_context(),
+                'coverage': dict(zip(page_ids, zip(
+                    matched[positions].tolist(), missing[positions].tolist()
+                ))),
+            }
+        ).data)
+
+    @action(
+        ['get'], detail=False, url_path='feed',
+        permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request):
+        return self._read_page(
+            prefetch_for_reading(
+                get_feed(request.user), request.user, self.fieldset
+            )
+        )
+
+    def _changes_position(self, params):
+        for param, parse in (
+            ('cursor', decode_cursor),
+            ('updated_since', lambda value: (parse_changed_at(value), 0)),
+        ):
+            if param in params:
+                try:
+                    return parse(params[param])
+                except InvalidCursor:
+                    raise serializers.ValidationError({
+                        param: INVALID_CHANGES_CURSOR.format(
+                            param, params[param]
+                        )
+                    })
+        return None
+
+    @action(
+        ['get'], detail=False, url_path='changes',
+    )
+    def changes(self, request):
+        params = request.query_params
+        after = self._changes_position(params)
+        limit = params.get('limit', str(settings.RECIPE_CHANGES_PAGE_SIZE))
+        if not limit.isdigit() or not (
+            0 < int(limit) <= settings.RECIPE_CHANGES_MAX_PAGE_SIZE
+        ):
+            raise serializers.ValidationError({
+                'limit': INVALID_CHANGES_LIMIT.format(
+                    settings.RECIPE_CHANGES_MAX_PAGE_SIZE
+                )
+            })
+        changes, has_more = recipe_changes(after, int(limit))
+        recipes = {
+            recipe['id']: recipe for recipe in self._read_data(
+                self.get_queryset().filter(pk__in=[
+                    pk for _, pk, deleted in changes if not deleted
+                ])
+            )
+        }
+        results = [
+            {
+                'id': pk,
+                'updated_at': changed_at,
+                'deleted': deleted,
+                # Рецепт мог быть удалён между двумя запросами: тогда
+                # клиент узнает об этом из надгробия на следующей странице.
+                'recipe': None if deleted else recipes.get(pk),
+            }
+            for changed_at, pk, deleted in changes
+        ]
+        if changes:
+            changed_at, pk, _ = changes[-1]
+            cursor = encode_cursor(changed_at, pk)
+        else:
+            cursor = params.get('cursor') or (
+                encode_cursor(*after) if after else None
+            )
+        return Response({
+            'cursor': cursor, 'has_more': has_more, 'results': results
+        })
+
     @action(
         ['get'], detail=False, url_path='download_shopping_cart',
         permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request):
-        recipes = Recipe.objects.filter(shoppingcarts__user=request.user)
-        ingredients = (
-            Ingredient.objects.filter(recipes__in=recipes)
-            .annotate(total_amount=Sum('recipe_ingredients__amount'))
-            .order_by('name')
-        )
-        return FileResponse(
-            generate_shopping_list(request.user, recipes, ingredients),
+        etag = export_etag(request.user)
+        if is_not_modified(request, etag):
+            return HttpResponseNotModified(headers={'ETag': etag})
+        response = FileResponse(
+            BytesIO(get_shopping_list(request.user, etag)),
             content_type='text/plain; charset=utf-8',
             as_attachment=True,
             filename=FILENAME.format(
                 date_format(date.today(), DATE_FORMAT_SHORT)
             )
         )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
 
-class FoodgramUserViewSet(UserViewSet):
-    filter_backends = DjangoFilterBackend,
-    filterset_class = LimitFilter
+class FoodgramUserViewSet(ReplicaReadMixin, UserViewSet):
+    pagination_class = LimitPageNumberPagination
+
+    def get_queryset(self):
+        return annotate_is_subscribed(
+            super().get_queryset(), self.request.user
+        )
 
     def get_permissions(self):
         if self.action == 'me':
@@ -165,14 +452,13 @@ class FoodgramUserViewSet(UserViewSet):
         permission_classes=[IsAuthenticated]
     )
     def subscriptions(self, request):
-        subscribe_data = SubscribedUserSerializer(
-            self.filter_queryset(self.get_queryset().filter(
-                authors__user=request.user
-            )), context={'request': request}, many=True
-        ).data
-        return self.get_paginated_response(
-            self.paginate_queryset(subscribe_data)
-        )
+        page = self.paginate_queryset(prefetch_subscribed_recipes(
+            self.get_queryset().filter(authors__user=request.user),
+            get_recipes_limit(request)
+        ))
+        return self.get_paginated_response(SubscribedUserSerializer(
+            page, context={'request': request}, many=True
+        ).data)
 
     @action(
         ['post', 'delete'], detail=True, url_path='subscribe',
@@ -194,6 +480,55 @@ class FoodgramUserViewSet(UserViewSet):
             raise serializers.ValidationError(
                 {'subscribe': ALREADY_SUBSCRIBED_ERROR.format(author)}
             )
+        author.is_subscribed = True
+        author.recipes_count = author.recipes.count()
         return Response(SubscribedUserSerializer(
             author, context={'request': request}
         ).data, status=status.HTTP_201_CREATED)
+
+    @action(
+        ['get'], detail=True, url_path='recipes_export',
+        permission_classes=[IsAuthenticated]
+    )
+    def recipes_export(self, request, id=None):
+        author = self.get_object()
+        if request.user != author and not request.user.is_staff:
+            raise PermissionDenied(EXPORT_FORBIDDEN)
+        response = StreamingHttpResponse(
+            stream_author_archive(author), content_type='application/zip'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{ARCHIVE_FILENAME.format(author.pk)}"'
+        )
+        return response
+
+
+class MetricsView(APIView):
+    authentication_classes = (
+        *api_settings.DEFAULT_AUTHENTICATION_CLASSES, SessionAuthentication
+    )
+    permission_classes = IsAdminUser,
+
+    def get(self, request):
+        return HttpResponse(
+            metrics.render(), content_type=METRICS_CONTENT_TYPE
+        )
+
+
+class BatchView(APIView):
+    # Права проверяет каждый вложенный запрос.
+    permission_classes = AllowAny,
+    viewsets = ()
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        started = time.perf_counter()
+        responses, wrote = run_batch(
+            request, serializer.validated_data['requests'], self.viewsets
+        )
+        request._request.writes_database = wrote
+        return Response({
+            'responses': responses,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+        })
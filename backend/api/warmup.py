@@ -0,0 +1,83 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.test import RequestFactory
+
+from .catalog import catalog_snapshot
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+from recipes.pantry import pantry_index
+from recipes.shortlinks import live_recipe_ids
+
+
+logger = logging.getLogger('foodgram.warmup')
+
+
+def _get(view, path, **params):
+    # Запросы идут прямо во вьюхи, минуя middleware: прогрев не должен
+    # попадать в метрики и журнал запросов.
+    response = view.as_view({'get': 'list'})(RequestFactory().get(
+        path, params, HTTP_HOST=(settings.ALLOWED_HOSTS or ['localhost'])[0]
+    ))
+    response.render()
+    return response.data
+
+
+def warm_tags():
+    return len(_get(TagViewSet, '/api/tags/'))
+
+
+def warm_ingredients():
+    return len(_get(IngredientViewSet, '/api/ingredients/'))
+
+
+def warm_ingredient_catalog():
+    catalog_snapshot(0)
+    return 1
+
+
+def warm_recipe_page(page):
+    return len(_get(RecipeViewSet, '/api/recipes/', page=page)['results'])
+
+
+def warm_pantry_index():
+    return pantry_index.refresh()
+
+
+def warm_short_links():
+    return live_recipe_ids.refresh()
+
+
+def warmers(pages):
+    return [
+        ('тэги', warm_tags),
+        ('продукты', warm_ingredients),
+        ('снимок каталога продуктов', warm_ingredient_catalog),
+        ('индекс продуктов в наличии', warm_pantry_index),
+        ('короткие ссылки', warm_short_links),
+        *(
+            (f'рецепты, страница {page}', lambda page=page: (
+                warm_recipe_page(page)
+            ))
+            for page in range(1, pages + 1)
+        ),
+    ]
+
+
+def _run(name, warmer):
+    started = time.perf_counter()
+    try:
+        return name, warmer(), time.perf_counter() - started, None
+    except Exception as error:
+        logger.exception('Прогрев «%s» не удался', name)
+        return name, 0, time.perf_counter() - started, error
+    finally:
+        connections.close_all()
+
+
+def warm_caches(pages=None, workers=None):
+    pages = settings.WARMUP_RECIPE_PAGES if pages is None else pages
+    with ThreadPoolExecutor(workers or settings.WARMUP_WORKERS) as executor:
+        return list(executor.map(lambda item: _run(*item), warmers(pages)))
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+
+from django.db.utils import OperationalError
+
+from foodgram_backend import metrics
+
+
+POOL_TIMEOUT_MESSAGE = (
+    'Нет свободного соединения с базой «{}»: ожидание дольше {} с.'
+)
+
+_semaphores = {}
+_semaphores_lock = threading.Lock()
+
+
+def _semaphore(alias, size):
+    # Ключ включает pid: воркер, созданный fork'ом, не должен наследовать
+    # занятые мастером слоты.
+    key = os.getpid(), alias
+    with _semaphores_lock:
+        if key not in _semaphores:
+            _semaphores[key] = threading.BoundedSemaphore(size)
+        return _semaphores[key]
+
+
+class PooledConnectionMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self.pool_slot = None
+
+    def _acquire_slot(self):
+        size = self.settings_dict.get('POOL_MAX_CONNECTIONS')
+        if not size:
+            return
+        slot = _semaphore(self.alias, size)
+        timeout = self.settings_dict.get('POOL_TIMEOUT')
+        started = time.perf_counter()
+        acquired = slot.acquire(timeout=timeout)
+        metrics.observe(
+            'foodgram_db_connection_wait_seconds',
+            time.perf_counter() - started, database=self.alias
+        )
+        if not acquired:
+            raise OperationalError(
+                POOL_TIMEOUT_MESSAGE.format(self.alias, timeout)
+            )
+        self.pool_slot = slot
+
+    def _release_slot(self):
+        slot, self.pool_slot = self.pool_slot, None
+        if slot is not None:
+            slot.release()
+
+    def get_new_connection(self, conn_params):
+        self._acquire_slot()
+        started = time.perf_counter()
+        try:
+            connection = super().get_new_connection(conn_params)
+        except Exception:
+            self._release_slot()
+            raise
+        metrics.observe(
+            'foodgram_db_connect_seconds',
+            time.perf_counter() - started, database=self.alias
+        )
+        # Только что открытое соединение проверять незачем.
+        self.health_check_done = True
+        return connection
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_slot()
+
+    def close_if_health_check_failed(self):
+        if (
+            self.connection is None
+            or self.health_check_done
+            or self.in_atomic_block
+            or not self.settings_dict.get('CONN_HEALTH_CHECKS')
+        ):
+            return
+        if not self.is_usable():
+            metrics.inc(
+                'foodgram_db_health_check_failures_total',
+                database=self.alias
+            )
+            self.close()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        # Постоянное соединение проверяется один раз за запрос, перед
+        # первым обращением к базе, а не на каждом курсоре.
+        self.close_if_health_check_failed()
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
@@ -0,0 +1,112 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+
+PIN_COOKIE = 'foodgram_primary'
+
+PIN_CACHE_KEY = 'replica-pin:{}'
+
+# Реплика выбирается один раз на запрос: при выборе на каждый запрос к
+# базе страница могла бы собираться из реплик с разным отставанием.
+_replica = ContextVar('replica', default=None)
+
+
+def _choose_replica(enabled):
+    if enabled and settings.DATABASE_REPLICAS:
+        return random.choice(settings.DATABASE_REPLICAS)
+    return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема реплик повторяет основную базу через репликацию.
+        return db not in settings.DATABASE_REPLICAS
+
+
+@contextmanager
+def use_replicas(enabled=True):
+    token = _replica.set(_choose_replica(enabled))
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def _user_id(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def is_pinned(request):
+    if PIN_COOKIE in request.COOKIES:
+        return True
+    user_id = _user_id(request)
+    return user_id is not None and bool(
+        cache.get(PIN_CACHE_KEY.format(user_id))
+    )
+
+
+def pin_to_primary(request, response=None):
+    # Cookie нужна анонимным клиентам (регистрация, вход), ключ в кеше —
+    # клиентам с токеном, которые cookie не хранят. Кеш должен быть общим
+    # для воркеров, это проверяет manage.py check.
+    if response is not None:
+        response.set_cookie(
+            PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True, samesite='Lax'
+        )
+    user_id = _user_id(request)
+    if user_id is not None:
+        cache.set(
+            PIN_CACHE_KEY.format(user_id), True,
+            settings.REPLICA_PIN_SECONDS
+        )
+
+
+class ReplicaReadMixin:
+    def dispatch(self, request, *args, **kwargs):
+        with use_replicas(False):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        # Пользователь известен только после аутентификации, поэтому
+        # решение о репликах принимается здесь, а не в dispatch.
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned(request):
+            _replica.set(_choose_replica(True))
+
+
+class ReplicaPinningMiddleware:
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # Представление может уточнить, была ли запись: пакетный POST
+        # из одних чтений не должен уводить клиента с реплик.
+        writes = getattr(
+            request, 'writes_database', request.method not in SAFE_METHODS
+        )
+        if writes and response.status_code < 400:
+            pin_to_primary(request, response)
+        return response
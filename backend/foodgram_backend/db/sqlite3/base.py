@@ -0,0 +1,7 @@
+from django.db.backends.sqlite3 import base
+
+from foodgram_backend.db.pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+    pass
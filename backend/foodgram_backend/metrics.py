@@ -0,0 +1,270 @@
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+CONNECTION_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5, 30
+)
+
+COUNTER, GAUGE, HISTOGRAM = 'counter', 'gauge', 'histogram'
+
+METRICS = {
+    'foodgram_requests_total': (COUNTER, 'Обработано запросов.', None),
+    'foodgram_request_duration_seconds': (
+        HISTOGRAM, 'Длительность обработки запроса.', LATENCY_BUCKETS
+    ),
+    'foodgram_request_queries': (
+        HISTOGRAM, 'Число SQL-запросов на один запрос.', QUERY_BUCKETS
+    ),
+    'foodgram_requests_in_flight': (
+        GAUGE, 'Запросы, обрабатываемые прямо сейчас.', None
+    ),
+    'foodgram_cache_requests_total': (
+        COUNTER, 'Обращения к кешам по результату (hit/miss).', None
+    ),
+    'foodgram_db_connection_wait_seconds': (
+        HISTOGRAM, 'Ожидание свободного слота в пуле соединений с БД.',
+        CONNECTION_BUCKETS
+    ),
+    'foodgram_db_connect_seconds': (
+        HISTOGRAM, 'Открытие нового соединения с БД.', CONNECTION_BUCKETS
+    ),
+    'foodgram_db_health_check_failures_total': (
+        COUNTER, 'Постоянные соединения, не прошедшие проверку.', None
+    ),
+    'foodgram_tasks_total': (
+        COUNTER, 'Фоновые задачи по результату.', None
+    ),
+    'foodgram_throttled_total': (
+        COUNTER, 'Запросы, отклонённые ограничением частоты.', None
+    ),
+}
+
+SNAPSHOT_FILENAME = 'metrics-{}.json'
+
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = defaultdict(float)
+        self.histograms = {}
+        self.flushed_at = 0
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.values[name, _labels_key(labels)] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = name, _labels_key(labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            histogram = self.histograms[key]
+            histogram[bisect.bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'values': [
+                    [name, labels, value]
+                    for (name, labels), value in self.values.items()
+                ],
+                'histograms': [
+                    [name, labels, histogram]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def flush(self):
+        directory = settings.METRICS_MULTIPROCESS_DIR
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, SNAPSHOT_FILENAME.format(os.getpid()))
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(f'{path}.tmp', path)
+        self.flushed_at = time.monotonic()
+
+    def maybe_flush(self):
+        if (
+            time.monotonic() - self.flushed_at
+            >= settings.METRICS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+
+registry = Registry()
+
+atexit.register(registry.flush)
+
+
+def inc(name, value=1, **labels):
+    registry.inc(name, labels, value)
+
+
+def observe(name, value, **labels):
+    registry.observe(name, labels, value)
+
+
+def record_cache(cache, hit):
+    registry.inc(
+        'foodgram_cache_requests_total',
+        {'cache': cache, 'result': 'hit' if hit else 'miss'}
+    )
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _collect():
+    snapshots = [registry.snapshot()]
+    directory = settings.METRICS_MULTIPROCESS_DIR
+    if directory:
+        for path in glob.glob(
+            os.path.join(directory, SNAPSHOT_FILENAME.format('*'))
+        ):
+            try:
+                with open(path) as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+            if snapshot['pid'] != os.getpid():
+                snapshots.append(snapshot)
+    values, histograms = defaultdict(float), {}
+    for snapshot in snapshots:
+        # Счётчики и гистограммы завершившихся воркеров сохраняются,
+        # а их gauge-значения уже неактуальны.
+        alive = _process_alive(snapshot['pid'])
+        for name, labels, value in snapshot['values']:
+            if METRICS[name][0] == GAUGE and not alive:
+                continue
+            values[name, tuple(map(tuple, labels))] += value
+        for name, labels, histogram in snapshot['histograms']:
+            key = name, tuple(map(tuple, labels))
+            if key not in histograms:
+                histograms[key] = [0] * len(histogram)
+            histograms[key] = [
+                total + value
+                for total, value in zip(histograms[key], histogram)
+            ]
+    return values, histograms
+
+
+def _format_labels(labels, **extra):
+    labels = [*labels, *extra.items()]
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in labels
+    )
+
+
+def render():
+    values, histograms = _collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for (metric, labels), value in sorted(values.items()):
+            if metric == name:
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), histogram):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{_format_labels(labels, le=bound)} '
+                    f'{cumulative}'
+                )
+            lines += [
+                f'{name}_sum{_format_labels(labels)} {histogram[-1]}',
+                f'{name}_count{_format_labels(labels)} {cumulative}',
+            ]
+    return '\n'.join(lines) + '\n'
+
+
+def view_name(view_func, method):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return view_func.__name__
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower())
+    return f'{view_class.__name__}.{action}' if action else view_class.__name__
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        request.metrics_view = 'unresolved'
+        inc('foodgram_requests_in_flight')
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(counter))
+                response = self.get_response(request)
+        finally:
+            inc('foodgram_requests_in_flight', -1)
+        labels = {'view': request.metrics_view, 'method': request.method}
+        observe(
+            'foodgram_request_duration_seconds',
+            time.perf_counter() - started, **labels
+        )
+        observe('foodgram_request_queries', counter.queries, **labels)
+        inc(
+            'foodgram_requests_total', status=response.status_code, **labels
+        )
+        registry.maybe_flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_name(view_func, request.method)
@@ -0,0 +1,137 @@
+import logging
+import os
+import re
+import sys
+import warnings
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.admin import ModelAdmin
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+
+logger = logging.getLogger('foodgram.nplusone')
+
+N_PLUS_ONE_MESSAGE = 'N+1 в {}: запрос выполнен {} раз: {}'
+
+CALL_SITE_DEPTH = 8
+
+PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+
+NUMBER = re.compile(r'\b\d+\b')
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+class NPlusOneWarning(UserWarning):
+    pass
+
+
+def normalize_sql(sql):
+    return NUMBER.sub('?', PLACEHOLDER_LIST.sub('(...)', sql))
+
+
+def _is_project_frame(frame):
+    filename = frame.f_code.co_filename
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and 'site-packages' not in filename
+        and filename != __file__
+    )
+
+
+def _culprit(frame):
+    # Ищем ближайший к запросу метод сериализатора или админки,
+    # иначе — ближайшую функцию проекта.
+    project_frame = None
+    while frame is not None:
+        # type() вместо isinstance(): isinstance вычислил бы ленивые
+        # объекты вроде request.user и выполнил бы лишний запрос.
+        owner = type(frame.f_locals.get('self'))
+        name = frame.f_code.co_name
+        if issubclass(owner, BaseSerializer):
+            field = frame.f_locals.get('field')
+            if name == 'to_representation' and field is not None:
+                return f'{owner.__name__}.{field.field_name}'
+            if name.startswith('get_') and _is_project_frame(frame):
+                return f'{owner.__name__}.{name}'
+        if issubclass(owner, ModelAdmin) and _is_project_frame(frame):
+            return f'{owner.__name__}.{name}'
+        if project_frame is None and _is_project_frame(frame):
+            project_frame = frame
+        frame = frame.f_back
+    if project_frame is None:
+        return 'неизвестное место'
+    return '{}:{} ({})'.format(
+        os.path.relpath(project_frame.f_code.co_filename, settings.BASE_DIR),
+        project_frame.f_lineno, project_frame.f_code.co_name
+    )
+
+
+def _call_site(frame):
+    call_site = []
+    while frame is not None and len(call_site) < CALL_SITE_DEPTH:
+        if _is_project_frame(frame):
+            call_site.append((frame.f_code.co_filename, frame.f_lineno))
+        frame = frame.f_back
+    return tuple(call_site)
+
+
+class NPlusOneDetector:
+    def __init__(self, threshold=None):
+        self.threshold = threshold or settings.NPLUSONE_THRESHOLD
+        self.statements = Counter()
+        self.culprits = {}
+        self.stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        frame = sys._getframe(1)
+        key = normalize_sql(sql), _call_site(frame)
+        if key not in self.culprits:
+            self.culprits[key] = _culprit(frame)
+        self.statements[key] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+    def problems(self):
+        return [
+            N_PLUS_ONE_MESSAGE.format(self.culprits[key], count, key[0])
+            for key, count in self.statements.items()
+            if count > self.threshold
+        ]
+
+    def report(self, raise_error=None):
+        problems = self.problems()
+        if not problems:
+            return
+        if settings.NPLUSONE_RAISE if raise_error is None else raise_error:
+            raise NPlusOneError('\n'.join(problems))
+        for problem in problems:
+            logger.warning(problem)
+            warnings.warn(problem, NPlusOneWarning)
+
+
+class NPlusOneMiddleware:
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with NPlusOneDetector() as detector:
+            response = self.get_response(request)
+        detector.report()
+        return response
@@ -0,0 +1,152 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+
+logger = logging.getLogger('foodgram.profiling')
+
+DUMP_FILENAME = '{:.0f}-{}-{}-{:.0f}ms.prof'
+
+_timings = ContextVar('profiling_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.render_started = None
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def start_render(self, response):
+        self.render_started = time.perf_counter()
+
+    def finish_render(self, response):
+        self.render += time.perf_counter() - self.render_started
+
+    def as_dict(self, total):
+        return {
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(self.db * 1000, 2),
+            'queries': self.queries,
+            'serialize_ms': round(self.serialize * 1000, 2),
+            'render_ms': round(self.render * 1000, 2),
+        }
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize * 1000:.2f}',
+            f'render;dur={self.render * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+
+def _timed(data_property):
+    def data(serializer):
+        timings = _timings.get()
+        if timings is None or timings.serializing:
+            return data_property.fget(serializer)
+        timings.serializing = True
+        started = time.perf_counter()
+        try:
+            return data_property.fget(serializer)
+        finally:
+            timings.serializing = False
+            timings.serialize += time.perf_counter() - started
+    data.profiled = True
+    return property(data)
+
+
+def install_serializer_timing():
+    # Время сериализации считается только для внешнего сериализатора:
+    # вложенные вызовы .data уже входят в его интервал.
+    for serializer_class in (serializers.Serializer,
+                             serializers.ListSerializer):
+        if not getattr(serializer_class.data.fget, 'profiled', False):
+            serializer_class.data = _timed(serializer_class.data)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_serializer_timing()
+
+    def _dump(self, profiler, request, total):
+        os.makedirs(settings.PROFILING_DUMP_DIR, exist_ok=True)
+        path = os.path.join(
+            settings.PROFILING_DUMP_DIR,
+            DUMP_FILENAME.format(
+                time.time() * 1000, request.method,
+                re.sub(r'[^\w-]+', '_', request.path).strip('_'),
+                total * 1000
+            )
+        )
+        profiler.dump_stats(path)
+        return path
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        sampled = random.random() < settings.PROFILING_SAMPLE_RATE
+        # Чтобы сохранить профиль медленного запроса, профилировать
+        # приходится каждый запрос: заранее длительность неизвестна.
+        profiler = (
+            cProfile.Profile()
+            if sampled or settings.PROFILING_SLOW_REQUEST_MS > 0 else None
+        )
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                if profiler:
+                    profiler.enable()
+                response = self.get_response(request)
+        finally:
+            if profiler:
+                profiler.disable()
+            _timings.reset(token)
+        total = time.perf_counter() - started
+        response['Server-Timing'] = timings.server_timing(total)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **timings.as_dict(total),
+        }
+        if sampled or profiler and (
+            total * 1000 >= settings.PROFILING_SLOW_REQUEST_MS
+        ):
+            record['profile'] = self._dump(profiler, request, total)
+        logger.info(json.dumps(record, ensure_ascii=False))
+        return response
+
+    def process_template_response(self, request, response):
+        timings = _timings.get()
+        if timings is not None:
+            timings.start_render(response)
+            response.add_post_render_callback(timings.finish_render)
+        return response
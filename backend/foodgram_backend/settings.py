@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 from dotenv import load_dotenv, find_dotenv
@@ -13,6 +14,8 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'secret_key')
 
 DEBUG = os.getenv('DEBUG', False) == 'True'
 
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '127.0.0.1,localhost').split(',')
 
 
@@ -29,9 +32,13 @@ INSTALLED_APPS = [
     'django_filters',
     'recipes',
     'api',
+    'tasks',
 ]
 
 MIDDLEWARE = [
+    'foodgram_backend.nplusone.NPlusOneMiddleware',
+    'foodgram_backend.profiling.ProfilingMiddleware',
+    'foodgram_backend.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,6 +46,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'foodgram_backend.db.replicas.ReplicaPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram_backend.urls'
@@ -62,24 +70,79 @@ TEMPLATES = [
 WSGI_APPLICATION = 'foodgram_backend.wsgi.application'
 
 
+# Переиспользование соединений: CONN_MAX_AGE > 0 оставляет соединение
+# открытым между запросами, проверка здоровья отсекает оборванные,
+# POOL_MAX_CONNECTIONS ограничивает число соединений одного процесса.
+DATABASE_CONNECTION_OPTIONS = {
+    'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+    'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', False) == 'True',
+    'POOL_MAX_CONNECTIONS': int(os.getenv('DB_POOL_MAX_CONNECTIONS', 0)),
+    'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+}
+
 if os.getenv('SQLITE', False) == 'True':
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            'ENGINE': 'foodgram_backend.db.sqlite3',
             'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            **DATABASE_CONNECTION_OPTIONS,
         }
     }
+    DATABASE_REPLICA_OVERRIDES = [
+        {'NAME': os.path.join(BASE_DIR, name)}
+        for name in os.getenv('SQLITE_REPLICAS', '').split(',') if name
+    ]
 else:
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            'ENGINE': 'foodgram_backend.db.postgresql',
             'NAME': os.getenv('POSTGRES_DB', 'django'),
             'USER': os.getenv('POSTGRES_USER', 'django_user'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', ''),
             'PORT': os.getenv('DB_PORT', '5432'),
+            **DATABASE_CONNECTION_OPTIONS,
         }
     }
+    DATABASE_REPLICA_OVERRIDES = [
+        dict(zip(('HOST', 'PORT'), host.split(':')))
+        for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host
+    ]
+
+# Реплики только для чтения: в тестах они зеркалят основную базу.
+DATABASE_REPLICAS = []
+for number, overrides in enumerate(DATABASE_REPLICA_OVERRIDES, 1):
+    DATABASE_REPLICAS.append(f'replica_{number}')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'], **overrides, 'TEST': {'MIRROR': 'default'}
+    }
+
+DATABASE_ROUTERS = ['foodgram_backend.db.replicas.ReplicaRouter']
+
+# Закрепление за основной базой после записи хранится в кеше default,
+# поэтому с репликами он должен быть общим (проверка api.E002).
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    'exports': {
+        'BACKEND': os.getenv(
+            'EXPORT_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('EXPORT_CACHE_LOCATION', 'exports'),
+        'TIMEOUT': int(os.getenv('EXPORT_CACHE_TIMEOUT', 24 * 60 * 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('EXPORT_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+}
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -126,13 +189,40 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.CostThrottle',
+    ],
+    # Шлюз nginx дописывает адрес клиента в X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
 
 }
 
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10_000))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 30))
+# Без общего кеша выход и деактивация доходят до других воркеров
+# только через AUTH_TOKEN_CACHE_TTL секунд.
+AUTH_TOKEN_SHARED_CACHE = os.getenv('AUTH_TOKEN_SHARED_CACHE', False) == 'True'
+
+# Списки рецептов, тэгов и продуктов собираются из .values() без
+# ModelSerializer; ответ совпадает с обычными сериализаторами.
+FAST_READ_SERIALIZERS = os.getenv('FAST_READ_SERIALIZERS', False) == 'True'
+
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 20))
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 4))
+
 
 DJOSER = {
     'SERIALIZERS': {
@@ -149,3 +239,102 @@ DJOSER = {
 
 
 AUTH_USER_MODEL = 'recipes.FoodgramUser'
+
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'foodgram': {
+            'handlers': ['console'],
+            'level': os.getenv('LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', False) == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_SLOW_REQUEST_MS = float(os.getenv('PROFILING_SLOW_REQUEST_MS', 0))
+PROFILING_DUMP_DIR = os.getenv(
+    'PROFILING_DUMP_DIR', os.path.join(BASE_DIR, 'profiles')
+)
+
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', False) == 'True'
+METRICS_MULTIPROCESS_DIR = os.getenv('METRICS_MULTIPROCESS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+
+
+NPLUSONE_ENABLED = os.getenv(
+    'NPLUSONE_ENABLED', str(DEBUG or TESTING)
+) == 'True'
+NPLUSONE_RAISE = os.getenv('NPLUSONE_RAISE', str(TESTING)) == 'True'
+NPLUSONE_THRESHOLD = int(os.getenv('NPLUSONE_THRESHOLD', 5))
+
+
+SHORT_LINK_REFRESH_SECONDS = int(os.getenv('SHORT_LINK_REFRESH_SECONDS', 300))
+SHORT_LINK_CACHE_TIMEOUT = int(os.getenv('SHORT_LINK_CACHE_TIMEOUT', 300))
+
+
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv('FEED_FANOUT_MAX_FOLLOWERS', 10_000))
+FEED_BACKFILL_SIZE = int(os.getenv('FEED_BACKFILL_SIZE', 100))
+FEED_BATCH_SIZE = 1000
+
+# Ответы на чтение рецептов. Нужен общий кеш (Redis, Memcached): с кешем
+# процесса manage.py check не пропустит включённую настройку.
+RESPONSE_CACHE_ENABLED = os.getenv(
+    'RESPONSE_CACHE_ENABLED', 'False'
+) == 'True'
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 5))
+RESPONSE_CACHE_STALE = int(os.getenv('RESPONSE_CACHE_STALE', 30))
+RESPONSE_COALESCING_WAIT = 1
+RESPONSE_COALESCING_POLL = 0.05
+
+# Ведра ограничения частоты: (ёмкость в токенах, пополнение в секунду).
+# Вёдра хранятся в кеше THROTTLE_CACHE, он должен быть общим для воркеров.
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'False') == 'True'
+THROTTLE_CACHE = os.getenv('THROTTLE_CACHE', 'default')
+THROTTLE_USER_BUCKET = (
+    int(os.getenv('THROTTLE_USER_CAPACITY', 120)),
+    float(os.getenv('THROTTLE_USER_RATE', 2)),
+)
+THROTTLE_IP_BUCKET = (
+    int(os.getenv('THROTTLE_IP_CAPACITY', 300)),
+    float(os.getenv('THROTTLE_IP_RATE', 5)),
+)
+THROTTLE_COSTS = {
+    'RecipeViewSet.download_shopping_cart': 10,
+    'RecipeViewSet.pantry': 3,
+    'IngredientViewSet.list': 3,
+    'IngredientViewSet.catalog': 5,
+    'FoodgramUserViewSet.subscriptions': 5,
+    'FoodgramUserViewSet.recipes_export': 60,
+}
+
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 100))
+RECIPES_LIMIT_MAX = int(os.getenv('RECIPES_LIMIT_MAX', 50))
+
+WARMUP_RECIPE_PAGES = int(os.getenv('WARMUP_RECIPE_PAGES', 5))
+WARMUP_WORKERS = int(os.getenv('WARMUP_WORKERS', 4))
+
+RECIPE_CHANGES_LAG = int(os.getenv('RECIPE_CHANGES_LAG', 5))
+RECIPE_CHANGES_PAGE_SIZE = 100
+RECIPE_CHANGES_MAX_PAGE_SIZE = 1000
+
+# В тестах задачи тоже только ставятся в очередь: иначе каждое сохранение
+# рецепта пересчитывало бы похожие рецепты целиком.
+TASKS_EAGER = os.getenv('TASKS_EAGER', 'False') == 'True'
+TASKS_POLL_INTERVAL = float(os.getenv('TASKS_POLL_INTERVAL', 1))
+TASKS_RETRY_DELAY = int(os.getenv('TASKS_RETRY_DELAY', 10))
+TASKS_TIMEOUT = int(os.getenv('TASKS_TIMEOUT', 600))
+SIMILAR_RECIPES_DELAY = int(os.getenv('SIMILAR_RECIPES_DELAY', 30))
+
+
+PANTRY_INDEX_REBUILD_INTERVAL = int(
+    os.getenv('PANTRY_INDEX_REBUILD_INTERVAL', 60)
+)
+PANTRY_INDEX_MAX_AGE = int(os.getenv('PANTRY_INDEX_MAX_AGE', 3600))
@@ -0,0 +1,22 @@
+import os
+import time
+
+
+def post_fork(server, worker):
+    # Каждый воркер прогревает свои кеши до того, как начнёт принимать
+    # запросы. Долгий прогрев должен укладываться в --timeout.
+    if os.getenv('WARM_CACHES_ON_START') != 'True':
+        return
+    os.environ.setdefault(
+        'DJANGO_SETTINGS_MODULE', 'foodgram_backend.settings'
+    )
+    import django
+    django.setup()
+    from api.warmup import warm_caches
+    started = time.monotonic()
+    results = warm_caches()
+    server.log.info(
+        'Воркер %s прогрет за %.2f с: %s', worker.pid,
+        time.monotonic() - started,
+        ', '.join(f'{name} {entries}' for name, entries, *_ in results)
+    )
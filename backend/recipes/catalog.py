@@ -0,0 +1,54 @@
+from django.db import connection
+
+from .models import (
+    INGREDIENTS, CatalogCounter, Ingredient, IngredientTombstone
+)
+
+
+CATALOG_OUTSIDE_TRANSACTION = (
+    'Версию каталога можно выдать только внутри транзакции, '
+    'в которой пишутся её строки.'
+)
+
+CATALOG_FIELDS = 'id', 'name', 'measurement_unit'
+
+
+def current_version(catalog=INGREDIENTS):
+    return CatalogCounter.objects.filter(name=catalog).values_list(
+        'value', flat=True
+    ).first() or 0
+
+
+def next_version(catalog=INGREDIENTS):
+    # Версия и её строки должны закоммититься вместе, иначе снимок каталога
+    # может запомнить версию без этих строк.
+    if not connection.in_atomic_block:
+        raise RuntimeError(CATALOG_OUTSIDE_TRANSACTION)
+    return CatalogCounter.increment(catalog)
+
+
+def stamp_ingredients(ingredients):
+    version = next_version()
+    for ingredient in ingredients:
+        ingredient.version = version
+    return ingredients
+
+
+def mark_ingredient_deleted(ingredient_id):
+    IngredientTombstone.objects.update_or_create(
+        ingredient_id=ingredient_id, defaults={'version': next_version()}
+    )
+
+
+def catalog_changes(since=0):
+    # Версия читается до строк: изменения, попавшие между запросами,
+    # клиент получит ещё раз со следующей синхронизацией.
+    version = current_version()
+    ingredients = Ingredient.objects.order_by('id')
+    removed = []
+    if since:
+        ingredients = ingredients.filter(version__gt=since)
+        removed = list(IngredientTombstone.objects.filter(
+            version__gt=since
+        ).values_list('ingredient_id', flat=True))
+    return version, list(ingredients.values_list(*CATALOG_FIELDS)), removed
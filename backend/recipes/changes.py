@@ -0,0 +1,82 @@
+import base64
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Recipe, RecipeTombstone
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(changed_at, pk):
+    return base64.urlsafe_b64encode(
+        f'{changed_at.isoformat()}|{pk}'.encode()
+    ).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        changed_at, pk = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)
+        ).decode().split('|')
+        return parse_changed_at(changed_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+
+
+def parse_changed_at(value):
+    try:
+        changed_at = parse_datetime(value)
+    except ValueError:
+        changed_at = None
+    if changed_at is None:
+        raise InvalidCursor(value)
+    if timezone.is_naive(changed_at):
+        changed_at = timezone.make_aware(changed_at, timezone.utc)
+    return changed_at
+
+
+def record_recipe_deletion(recipe_id):
+    RecipeTombstone.objects.update_or_create(
+        recipe_id=recipe_id, defaults={'deleted_at': timezone.now()}
+    )
+
+
+def _after(field, id_field, after):
+    changed_at, pk = after
+    return Q(**{f'{field}__gt': changed_at}) | Q(**{
+        field: changed_at, f'{id_field}__gt': pk
+    })
+
+
+def recipe_changes(after, limit):
+    # Изменения моложе RECIPE_CHANGES_LAG не отдаются: транзакция с более
+    # ранней меткой времени может закоммититься позже, и курсор бы её
+    # перепрыгнул.
+    until = timezone.now() - timedelta(seconds=settings.RECIPE_CHANGES_LAG)
+    updated = Recipe.objects.filter(updated_at__lt=until).order_by(
+        'updated_at', 'id'
+    )
+    deleted = RecipeTombstone.objects.filter(deleted_at__lt=until).order_by(
+        'deleted_at', 'recipe_id'
+    )
+    if after is not None:
+        updated = updated.filter(_after('updated_at', 'id', after))
+        deleted = deleted.filter(_after('deleted_at', 'recipe_id', after))
+    changes = list(heapq.merge(
+        (
+            (changed_at, pk, False) for changed_at, pk
+            in updated.values_list('updated_at', 'id')[:limit + 1]
+        ),
+        (
+            (changed_at, pk, True) for changed_at, pk
+            in deleted.values_list('deleted_at', 'recipe_id')[:limit + 1]
+        ),
+    ))
+    return changes[:limit], len(changes) > limit
@@ -0,0 +1,137 @@
+import json
+import os
+import zipfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from .models import Recipe, RecipeIngredients
+
+
+EXPORT_CHUNK_SIZE = 200
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+ARCHIVE_FILENAME = 'recipes-{}.zip'
+
+
+class StreamBuffer:
+    # Поток без seek(): zipfile сам пишет дескрипторы данных после каждого
+    # файла, а накопленные байты отдаются клиенту и сбрасываются.
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _recipe_chunks(author, chunk_size):
+    # В Django 3.2 iterator() игнорирует prefetch_related, поэтому рецепты
+    # идут пачками по ключу, и тэги с продуктами подгружаются на пачку.
+    recipes = Recipe.objects.filter(author=author).order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(recipes.filter(pk__gt=last_pk).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                RecipeIngredients.objects.select_related('ingredient')
+                .order_by('pk')
+            ),
+        )[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def _recipe_metadata(recipe, image_path):
+    return {
+        'id': recipe.pk,
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'pub_date': recipe.pub_date,
+        'updated_at': recipe.updated_at,
+        'image': image_path,
+        'tags': [
+            {'name': tag.name, 'slug': tag.slug} for tag in recipe.tags.all()
+        ],
+        'ingredients': [
+            {
+                'name': recipe_ingredient.ingredient.name,
+                'measurement_unit':
+                    recipe_ingredient.ingredient.measurement_unit,
+                'amount': recipe_ingredient.amount,
+            } for recipe_ingredient in recipe.recipe_ingredients.all()
+        ],
+    }
+
+
+def _dumps(data):
+    return json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2
+    ).encode()
+
+
+def _open_media(field_file):
+    if not field_file:
+        return None
+    try:
+        return field_file.storage.open(field_file.name, 'rb')
+    except FileNotFoundError:
+        return None
+
+
+def _write_file(archive, buffer, path, source):
+    # Картинки уже сжаты: кладём их без повторного сжатия.
+    with source, archive.open(
+        zipfile.ZipInfo(path), 'w', force_zip64=True
+    ) as target:
+        for chunk in iter(lambda: source.read(FILE_CHUNK_SIZE), b''):
+            target.write(chunk)
+            yield buffer.drain()
+
+
+def stream_author_archive(author, chunk_size=EXPORT_CHUNK_SIZE):
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        avatar = _open_media(author.avatar)
+        avatar_path = (
+            f'avatar{os.path.splitext(author.avatar.name)[1]}'
+            if avatar else None
+        )
+        archive.writestr('author.json', _dumps({
+            'id': author.pk,
+            'username': author.username,
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+            'avatar': avatar_path,
+        }))
+        if avatar:
+            yield from _write_file(archive, buffer, avatar_path, avatar)
+        for chunk in _recipe_chunks(author, chunk_size):
+            for recipe in chunk:
+                folder = f'recipes/{recipe.pk}'
+                image = _open_media(recipe.image)
+                image_path = (
+                    f'{folder}/image{os.path.splitext(recipe.image.name)[1]}'
+                    if image else None
+                )
+                archive.writestr(
+                    f'{folder}/recipe.json',
+                    _dumps(_recipe_metadata(recipe, image_path))
+                )
+                yield buffer.drain()
+                if image:
+                    yield from _write_file(archive, buffer, image_path, image)
+    yield buffer.drain()
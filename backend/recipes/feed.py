@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.db.models import Count, OuterRef, Q, Subquery
+
+from .models import FeedEntry, Recipe, Subscribe
+
+
+def followers_count(author_id):
+    return Subscribe.objects.filter(subscribing_id=author_id).count()
+
+
+def _fans_out(author_id):
+    return followers_count(author_id) <= settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out_recipe(recipe):
+    if not _fans_out(recipe.author_id):
+        return 0
+    return len(FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe=recipe, pub_date=recipe.pub_date)
+            for user_id in Subscribe.objects.filter(
+                subscribing_id=recipe.author_id
+            ).values_list('user_id', flat=True).iterator()
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    ))
+
+
+def backfill_feed(user_id, author_id):
+    if not _fans_out(author_id):
+        return 0
+    return len(FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe_id=pk, pub_date=pub_date)
+            for pk, pub_date in Recipe.objects.filter(
+                author_id=author_id
+            ).values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_SIZE]
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    ))
+
+
+def crossed_fan_out_threshold(followers_before, followers_after):
+    return followers_after <= settings.FEED_FANOUT_MAX_FOLLOWERS < (
+        followers_before
+    )
+
+
+def backfill_followers(author_id):
+    # Пока подписчиков было больше порога, рецепты автора по лентам не
+    # раскладывались: после возвращения под порог их нужно разложить.
+    if not _fans_out(author_id):
+        return 0
+    recipes = list(Recipe.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_SIZE])
+    return len(FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe_id=pk, pub_date=pub_date)
+            for user_id in Subscribe.objects.filter(
+                subscribing_id=author_id
+            ).values_list('user_id', flat=True).iterator()
+            for pk, pub_date in recipes
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    ))
+
+
+def prune_feed(user_id, author_id):
+    return FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()[0]
+
+
+def get_feed(user):
+    # Рецепты авторов с огромным числом подписчиков не раскладываются
+    # по лентам при публикации и читаются из таблицы рецептов напрямую.
+    popular_authors = list(Subscribe.objects.filter(user=user).annotate(
+        followers=Subquery(
+            Subscribe.objects.filter(subscribing=OuterRef('subscribing'))
+            .order_by().values('subscribing')
+            .annotate(count=Count('pk')).values('count')
+        )
+    ).filter(
+        followers__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).values_list('subscribing', flat=True))
+    if not popular_authors:
+        return Recipe.objects.filter(feed_entries__user=user).order_by(
+            '-feed_entries__pub_date', '-pk'
+        )
+    return Recipe.objects.filter(
+        Q(pk__in=FeedEntry.objects.filter(user=user).values('recipe'))
+        | Q(author_id__in=popular_authors)
+    ).order_by('-pub_date', '-pk')
@@ -0,0 +1,43 @@
+from time import monotonic
+
+from django.contrib.auth import get_user_model
+from django.core.management import base
+
+from recipes.export import ARCHIVE_FILENAME, stream_author_archive
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Выгрузка всех рецептов автора в ZIP: JSON по каждому рецепту '
+        'и исходные файлы картинок из MEDIA_ROOT.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('author', help='id, логин или почта автора.')
+        parser.add_argument(
+            '-o', '--output', help='Путь к архиву, по умолчанию '
+            f'{ARCHIVE_FILENAME.format("<id>")} в текущей папке.'
+        )
+
+    def handle(self, *args, **options):
+        author = options['author']
+        lookup = (
+            {'pk': author} if author.isdigit()
+            else {'email': author} if '@' in author
+            else {'username': author}
+        )
+        try:
+            author = get_user_model().objects.get(**lookup)
+        except get_user_model().DoesNotExist:
+            raise base.CommandError(f'Автор {author} не найден')
+        path = options['output'] or ARCHIVE_FILENAME.format(author.pk)
+        started = monotonic()
+        size = 0
+        with open(path, 'wb') as file:
+            for chunk in stream_author_archive(author):
+                file.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецепты {author.username} выгружены в {path}: '
+            f'{size / 1024 / 1024:.1f} МБ за {monotonic() - started:.1f} с'
+        ))
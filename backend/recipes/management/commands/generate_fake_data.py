@@ -0,0 +1,260 @@
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from time import monotonic
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import base
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from recipes.models import (
+    Favorite, FoodgramUser, Ingredient, Recipe, RecipeIngredients,
+    ShoppingCart, Subscribe, Tag
+)
+
+
+FAKE_PASSWORD = 'foodgram-fake-password'
+
+FAKE_IMAGE = 'recipes/recipes/fake.jpg'
+
+# Чем больше показатель, тем сильнее выборка смещена к первым элементам:
+# немногие авторы пишут большую часть рецептов, немногие рецепты собирают
+# большую часть избранного и корзин.
+AUTHOR_SKEW = 3
+RECIPE_SKEW = 4
+INGREDIENT_SKEW = 2
+
+# Параметры распределения Парето для «длинного хвоста» активности.
+FAVORITES_SHAPE = 1.5
+SHOPPING_CART_SHAPE = 1.2
+SUBSCRIPTIONS_SHAPE = 1.3
+
+ADJECTIVES = (
+    'Домашний', 'Быстрый', 'Летний', 'Острый', 'Бабушкин', 'Праздничный',
+    'Постный', 'Сытный', 'Лёгкий', 'Пряный',
+)
+
+DISHES = (
+    'борщ', 'плов', 'салат', 'пирог', 'суп', 'омлет', 'рагу', 'гуляш',
+    'пирожок', 'соус', 'десерт', 'кекс',
+)
+
+WORDS = (
+    'нарезать', 'смешать', 'обжарить', 'добавить', 'посолить', 'варить',
+    'минут', 'до', 'готовности', 'на', 'среднем', 'огне', 'подавать',
+    'горячим', 'с', 'зеленью', 'и', 'сметаной',
+)
+
+NO_INGREDIENTS_OR_TAGS = (
+    'Сначала загрузите продукты и тэги: '
+    'import_ingredients и import_tags.'
+)
+
+
+def _skewed_choice(rng, first_id, count, skew):
+    return first_id + int(count * rng.random() ** skew)
+
+
+def _long_tail_count(rng, shape, limit):
+    return min(int(rng.paretovariate(shape)) - 1, limit)
+
+
+def _create_users(start, stop, seed, first_id, password):
+    rng = random.Random(f'{seed}-users-{start}')
+    users = []
+    for user_id in range(first_id + start, first_id + stop):
+        users.append(FoodgramUser(
+            id=user_id,
+            username=f'fake_{user_id}',
+            email=f'fake_{user_id}@example.com',
+            first_name=rng.choice(ADJECTIVES),
+            last_name=rng.choice(DISHES).capitalize(),
+            password=password,
+        ))
+    with transaction.atomic():
+        FoodgramUser.objects.bulk_create(users)
+    return len(users)
+
+
+def _create_recipes(
+    start, stop, seed, first_id, first_user_id, users_count,
+    ingredient_ids, tag_ids
+):
+    rng = random.Random(f'{seed}-recipes-{start}')
+    recipes, recipe_ingredients, recipe_tags = [], [], []
+    for recipe_id in range(first_id + start, first_id + stop):
+        recipes.append(Recipe(
+            id=recipe_id,
+            author_id=_skewed_choice(
+                rng, first_user_id, users_count, AUTHOR_SKEW
+            ),
+            name=f'{rng.choice(ADJECTIVES)} {rng.choice(DISHES)}',
+            text=' '.join(rng.choices(WORDS, k=rng.randint(10, 60))),
+            cooking_time=rng.randint(1, 180),
+            image=FAKE_IMAGE,
+        ))
+        recipe_ingredients.extend(
+            RecipeIngredients(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_ids[_skewed_choice(
+                    rng, 0, len(ingredient_ids), INGREDIENT_SKEW
+                )],
+                amount=rng.randint(1, 1000),
+            ) for _ in range(rng.randint(2, 12))
+        )
+        recipe_tags.extend(
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for tag_id in rng.sample(
+                tag_ids, rng.randint(1, min(3, len(tag_ids)))
+            )
+        )
+    with transaction.atomic():
+        Recipe.objects.bulk_create(recipes)
+        RecipeIngredients.objects.bulk_create(_unique_ingredients(
+            recipe_ingredients
+        ))
+        Recipe.tags.through.objects.bulk_create(recipe_tags)
+    return len(recipes)
+
+
+def _unique_ingredients(recipe_ingredients):
+    seen = set()
+    for recipe_ingredient in recipe_ingredients:
+        key = recipe_ingredient.recipe_id, recipe_ingredient.ingredient_id
+        if key not in seen:
+            seen.add(key)
+            yield recipe_ingredient
+
+
+def _create_activity(
+    start, stop, seed, first_user_id, users_count, first_recipe_id,
+    recipes_count, limits
+):
+    rng = random.Random(f'{seed}-activity-{start}')
+    favorites, shopping_carts, subscriptions = [], [], []
+    for user_id in range(first_user_id + start, first_user_id + stop):
+        for model, objects, shape, limit in (
+            (Favorite, favorites, FAVORITES_SHAPE, limits['favorites']),
+            (ShoppingCart, shopping_carts, SHOPPING_CART_SHAPE,
+             limits['shopping_cart']),
+        ):
+            objects.extend(
+                model(user_id=user_id, recipe_id=recipe_id)
+                for recipe_id in {
+                    _skewed_choice(
+                        rng, first_recipe_id, recipes_count, RECIPE_SKEW
+                    ) for _ in range(_long_tail_count(rng, shape, limit))
+                }
+            )
+        subscriptions.extend(
+            Subscribe(user_id=user_id, subscribing_id=author_id)
+            for author_id in {
+                _skewed_choice(rng, first_user_id, users_count, AUTHOR_SKEW)
+                for _ in range(_long_tail_count(
+                    rng, SUBSCRIPTIONS_SHAPE, limits['subscriptions']
+                ))
+            } if author_id != user_id
+        )
+    with transaction.atomic():
+        Favorite.objects.bulk_create(favorites)
+        ShoppingCart.objects.bulk_create(shopping_carts)
+        Subscribe.objects.bulk_create(subscriptions)
+    return len(favorites) + len(shopping_carts) + len(subscriptions)
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Генерация синтетических данных продакшен-масштаба: пользователей, '
+        'рецептов, избранного, корзин и подписок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--recipes', type=int, default=100_000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора: одинаковое зерно на одинаковой базе '
+                 'даёт одинаковые данные при любом числе процессов.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число процессов для параллельной вставки.'
+        )
+        parser.add_argument('--max-favorites', type=int, default=500)
+        parser.add_argument('--max-shopping-cart', type=int, default=2_000)
+        parser.add_argument('--max-subscriptions', type=int, default=300)
+
+    def _run(self, executor, label, func, total, batch_size, *args):
+        started = monotonic()
+        chunks = [
+            (start, min(start + batch_size, total))
+            for start in range(0, total, batch_size)
+        ]
+        calls = [(*chunk, *args) for chunk in chunks]
+        if executor is None:
+            created = sum(func(*call) for call in calls)
+        else:
+            created = sum(future.result() for future in [
+                executor.submit(func, *call) for call in calls
+            ])
+        self.stdout.write(
+            f'{label}: {created} за {monotonic() - started:.1f} с'
+        )
+
+    def handle(self, *args, **options):
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        if not ingredient_ids or not tag_ids:
+            raise base.CommandError(NO_INGREDIENTS_OR_TAGS)
+        seed = options['seed']
+        batch_size = options['batch_size']
+        users_count, recipes_count = options['users'], options['recipes']
+        first_user_id = (
+            FoodgramUser.objects.aggregate(Max('id'))['id__max'] or 0
+        ) + 1
+        first_recipe_id = (
+            Recipe.objects.aggregate(Max('id'))['id__max'] or 0
+        ) + 1
+        limits = {
+            'favorites': options['max_favorites'],
+            'shopping_cart': options['max_shopping_cart'],
+            'subscriptions': options['max_subscriptions'],
+        }
+        password = make_password(FAKE_PASSWORD)
+        executor = None
+        if options['workers'] > 1:
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                options['workers'],
+                mp_context=multiprocessing.get_context('fork')
+            )
+        started = monotonic()
+        try:
+            self._run(
+                executor, 'Пользователи', _create_users, users_count,
+                batch_size, seed, first_user_id, password
+            )
+            self._run(
+                executor, 'Рецепты', _create_recipes, recipes_count,
+                batch_size, seed, first_recipe_id, first_user_id,
+                users_count, ingredient_ids, tag_ids
+            )
+            self._run(
+                executor, 'Избранное, корзины и подписки', _create_activity,
+                users_count, batch_size, seed, first_user_id, users_count,
+                first_recipe_id, recipes_count, limits
+            )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [FoodgramUser, Recipe]
+            ):
+                cursor.execute(sql)
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные сгенерированы за {monotonic() - started:.1f} с'
+        ))
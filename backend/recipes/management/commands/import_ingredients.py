@@ -1,6 +1,12 @@
 from .import_json import ImportJsonCommand
+from recipes.catalog import stamp_ingredients
 from recipes.models import Ingredient
 
 
 class Command(ImportJsonCommand):
     model = Ingredient
+
+    def prepare(self, objects):
+        # bulk_create не вызывает save(): версию каталога ставим сами,
+        # одну на весь импорт, в той же транзакции.
+        return stamp_ingredients(objects)
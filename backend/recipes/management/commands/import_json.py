@@ -1,6 +1,7 @@
 import json
 
 from django.core.management import base
+from django.db import transaction
 
 
 class ImportJsonCommand(base.BaseCommand):
@@ -12,12 +13,17 @@ class ImportJsonCommand(base.BaseCommand):
             'json_file_path', help='Путь к JSON файлу.'
         )
 
+    def prepare(self, objects):
+        return objects
+
     def handle(self, *args, **options):
         try:
             file_path = options['json_file_path']
             with open(file_path, 'r', encoding='utf-8') as file:
+                items = json.load(file)
+            with transaction.atomic():
                 objects = self.model.objects.bulk_create(
-                    (self.model(**item) for item in json.load(file)),
+                    self.prepare([self.model(**item) for item in items]),
                     ignore_conflicts=True
                 )
             total_objects = len(objects)
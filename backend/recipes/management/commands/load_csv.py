@@ -2,8 +2,9 @@ import csv
 import os
 
 from django.core.management.base import BaseCommand
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
+from recipes.catalog import stamp_ingredients
 from recipes.models import Ingredient, Tag
 
 
@@ -56,7 +57,10 @@ class Command(BaseCommand):
                                 )
                             )
                     try:
-                        Model.objects.bulk_create(objects)
+                        with transaction.atomic():
+                            if Model == Ingredient:
+                                stamp_ingredients(objects)
+                            Model.objects.bulk_create(objects)
                         self.stdout.write(self.style.SUCCESS(
                             'Данные успешно импортированы в модель '
                             f'{Model.__name__} из {file_name}'
@@ -0,0 +1,19 @@
+from django.core.management import base
+
+from recipes.feed import backfill_feed
+from recipes.models import Subscribe
+
+
+class Command(base.BaseCommand):
+    help = 'Заполнение лент подписок по существующим подпискам.'
+
+    def handle(self, *args, **options):
+        total = sum(
+            backfill_feed(user_id, author_id)
+            for user_id, author_id in Subscribe.objects.values_list(
+                'user_id', 'subscribing_id'
+            ).iterator()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} записей добавлено в ленты подписок'
+        ))
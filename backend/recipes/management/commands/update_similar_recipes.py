@@ -0,0 +1,33 @@
+from time import monotonic
+
+from django.core.management import base
+
+from recipes.similarity import update_similar_recipes
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Пересчёт похожих рецептов по пересечению продуктов. По умолчанию '
+        'обновляются только рецепты, изменённые с прошлого запуска, '
+        'и рецепты, чьи соседи из-за этого поменялись.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать таблицу похожих рецептов полностью.'
+        )
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--block-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = monotonic()
+        total = update_similar_recipes(
+            full=options['full'],
+            top=options['top'],
+            block_size=options['block_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Похожие рецепты пересчитаны для {total} рецептов '
+            f'за {monotonic() - started:.1f} с'
+        ))
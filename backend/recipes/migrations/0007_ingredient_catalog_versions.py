@@ -0,0 +1,53 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:04
+
+from django.db import migrations, models
+
+
+def stamp_existing_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    CatalogCounter = apps.get_model('recipes', 'CatalogCounter')
+    if Ingredient.objects.exists():
+        Ingredient.objects.update(version=1)
+        CatalogCounter.objects.create(name='ingredients', value=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_stable_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogCounter',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='Каталог')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия каталога',
+                'verbose_name_plural': 'Версии каталогов',
+            },
+        ),
+        migrations.CreateModel(
+            name='IngredientTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingredient_id', models.BigIntegerField(unique=True, verbose_name='Удалённый продукт')),
+                ('version', models.BigIntegerField(db_index=True, verbose_name='Версия каталога')),
+            ],
+            options={
+                'verbose_name': 'Удалённый продукт',
+                'verbose_name_plural': 'Удалённые продукты',
+                'ordering': ('version',),
+            },
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Версия каталога'),
+        ),
+        migrations.RunPython(
+            stamp_existing_ingredients, migrations.RunPython.noop
+        ),
+    ]
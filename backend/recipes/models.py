@@ -1,7 +1,9 @@
 from django.contrib.auth import models as auth_models, validators
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 
 
 USERNAME_HELP_TEXT = ('Обязательное поле. Только буквы,'
@@ -9,6 +11,8 @@ USERNAME_HELP_TEXT = ('Обязательное поле. Только букв
 
 SELF_SUBSCRIBE_ERROR = 'Нельзя подписаться на самого себя.'
 
+INGREDIENTS = 'ingredients'
+
 MIN_VALUE_COOKING_TIME = 1
 
 MIN_VALUE_AMOUNT = 1
@@ -77,6 +81,10 @@ class Ingredient(models.Model):
     name = models.CharField(max_length=128, verbose_name='Название')
     measurement_unit = models.CharField(max_length=64,
                                         verbose_name='Единица измерения')
+    version = models.BigIntegerField(
+        default=0, db_index=True, editable=False,
+        verbose_name='Версия каталога'
+    )
 
     class Meta:
         verbose_name = 'Продукт'
@@ -92,6 +100,52 @@ class Ingredient(models.Model):
     def __str__(self):
         return f'{self.name[:21]} в {self.measurement_unit[:21]}'
 
+    def save(self, *args, **kwargs):
+        # Версия каталога и сама строка коммитятся в одной транзакции.
+        with transaction.atomic():
+            self.version = CatalogCounter.increment(INGREDIENTS)
+            super().save(*args, **kwargs)
+
+
+class CatalogCounter(models.Model):
+    name = models.CharField(
+        max_length=32, primary_key=True, verbose_name='Каталог'
+    )
+    value = models.BigIntegerField(default=0, verbose_name='Версия')
+
+    class Meta:
+        verbose_name = 'Версия каталога'
+        verbose_name_plural = 'Версии каталогов'
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+    @classmethod
+    def increment(cls, name):
+        # UPDATE держит блокировку строки счётчика до конца внешней
+        # транзакции: следующая версия не выдаётся, пока строки с текущей
+        # не закоммичены.
+        cls.objects.get_or_create(name=name)
+        cls.objects.filter(name=name).update(value=F('value') + 1)
+        return cls.objects.get(name=name).value
+
+
+class IngredientTombstone(models.Model):
+    ingredient_id = models.BigIntegerField(
+        unique=True, verbose_name='Удалённый продукт'
+    )
+    version = models.BigIntegerField(
+        db_index=True, verbose_name='Версия каталога'
+    )
+
+    class Meta:
+        verbose_name = 'Удалённый продукт'
+        verbose_name_plural = 'Удалённые продукты'
+        ordering = ('version',)
+
+    def __str__(self):
+        return f'{self.ingredient_id} удалён в версии {self.version}'
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=32, unique=True,
@@ -121,6 +175,8 @@ class Recipe(models.Model):
     )
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации')
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Дата изменения')
     ingredients = models.ManyToManyField(
         Ingredient,
         verbose_name='Список продуктов',
@@ -132,12 +188,40 @@ class Recipe(models.Model):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         default_related_name = 'recipes'
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=['updated_at', 'id'], name='recipe_updated_at_id_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.author} - {self.name[:21]}'
 
 
+class RecipeTombstone(models.Model):
+    recipe_id = models.BigIntegerField(
+        unique=True, verbose_name='Удалённый рецепт'
+    )
+    deleted_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Дата удаления'
+    )
+
+    class Meta:
+        verbose_name = 'Удалённый рецепт'
+        verbose_name_plural = 'Удалённые рецепты'
+        ordering = ('deleted_at', 'recipe_id')
+        indexes = [
+            models.Index(
+                fields=['deleted_at', 'recipe_id'],
+                name='recipe_tombstone_deleted_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id} удалён {self.deleted_at}'
+
+
 class RecipeIngredients(models.Model):
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE,
@@ -195,3 +279,65 @@ class ShoppingCart(UserRecipeBaseModel):
     class Meta(UserRecipeBaseModel.Meta):
         verbose_name = 'Списки покупок'
         verbose_name_plural = 'Список покупок'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        FoodgramUser, on_delete=models.CASCADE,
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        default_related_name = 'feed_entries'
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='feed_user_pub_date_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user.username[:21]}'
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        verbose_name='Рецепт', related_name='similar_recipes',
+    )
+    similar = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        verbose_name='Похожий рецепт', related_name='+',
+    )
+    score = models.FloatField(verbose_name='Сходство')
+    computed_at = models.DateTimeField(verbose_name='Дата расчёта')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'], name='unique_similar_recipe'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'], name='similar_recipe_score_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} ~ {self.similar} ({self.score:.2f})'
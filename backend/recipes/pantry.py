@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Sum
+
+from .models import Recipe, RecipeIngredients
+from .similarity import IngredientMatrix
+
+
+Snapshot = namedtuple(
+    'Snapshot', ('recipe_ids', 'sizes', 'ingredients', 'tags')
+)
+
+
+def _compress(positions, total):
+    # Частые продукты хранятся плотной битовой картой, редкие — списком
+    # позиций: выбирается то, что занимает меньше памяти.
+    if len(positions) * 32 > total:
+        mask = np.zeros(total, dtype=bool)
+        mask[positions] = True
+        return np.packbits(mask)
+    return positions.astype(np.uint32)
+
+
+def _add(counts, posting):
+    if posting.dtype == np.uint8:
+        counts += np.unpackbits(posting, count=len(counts))
+    else:
+        counts[posting] += 1
+
+
+def _recipes_version():
+    # Версия берётся из базы, а не из кеша: кеш процесса у каждого воркера
+    # свой, и правку в одном остальные бы не заметили. Строки состава и
+    # тэгов при правке пересоздаются с новыми id, поэтому число и сумма id
+    # меняются при любой правке, в каком бы порядке ни фиксировались
+    # транзакции. Max(updated_at) этого не гарантирует.
+    return (
+        Recipe.objects.count(),
+        *RecipeIngredients.objects.aggregate(
+            count=Count('id'), ids=Sum('id')
+        ).values(),
+        *Recipe.tags.through.objects.aggregate(
+            count=Count('id'), ids=Sum('id')
+        ).values(),
+    )
+
+
+class PantryIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.version = None
+        self.built_at = None
+        self.checked_at = None
+
+    def build(self):
+        matrix = IngredientMatrix()
+        total = len(matrix.recipe_ids)
+        columns = matrix.matrix.tocsc()
+        ingredients = {
+            int(ingredient_id): _compress(
+                columns.indices[columns.indptr[column]:
+                                columns.indptr[column + 1]],
+                total
+            )
+            for column, ingredient_id in enumerate(matrix.ingredient_ids)
+        }
+        tag_recipes = defaultdict(list)
+        for recipe_id, slug in Recipe.tags.through.objects.values_list(
+            'recipe_id', 'tag__slug'
+        ).iterator():
+            tag_recipes[slug].append(recipe_id)
+        tags = {
+            slug: _compress(matrix.rows(recipe_ids), total)
+            for slug, recipe_ids in tag_recipes.items()
+        }
+        return Snapshot(
+            matrix.recipe_ids, matrix.sizes.astype(np.int32),
+            ingredients, tags
+        )
+
+    def refresh(self):
+        version = _recipes_version()
+        snapshot = self.build()
+        with self.lock:
+            self.snapshot, self.version = snapshot, version
+            self.built_at = self.checked_at = time.monotonic()
+        return len(snapshot.recipe_ids)
+
+    def invalidate(self):
+        # Свой процесс перестраивает индекс сразу, остальные заметят
+        # новую версию через PANTRY_INDEX_REBUILD_INTERVAL.
+        self.version = None
+
+    def _stale(self):
+        now = time.monotonic()
+        if self.built_at is None:
+            return True
+        if now - self.built_at > settings.PANTRY_INDEX_MAX_AGE:
+            return True
+        if now - self.checked_at <= settings.PANTRY_INDEX_REBUILD_INTERVAL:
+            return False
+        self.checked_at = now
+        return self.version != _recipes_version()
+
+    def _current(self):
+        if self._stale():
+            self.refresh()
+        return self.snapshot
+
+    def search(self, ingredient_ids, tags=()):
+        snapshot = self._current()
+        counts = np.zeros(len(snapshot.recipe_ids), dtype=np.int32)
+        for ingredient_id in set(ingredient_ids):
+            if ingredient_id in snapshot.ingredients:
+                _add(counts, snapshot.ingredients[ingredient_id])
+        candidates = np.flatnonzero(counts)
+        if tags:
+            tagged = np.zeros(len(snapshot.recipe_ids), dtype=np.int32)
+            for slug in set(tags):
+                if slug in snapshot.tags:
+                    _add(tagged, snapshot.tags[slug])
+            candidates = candidates[tagged[candidates] > 0]
+        recipe_ids = snapshot.recipe_ids[candidates]
+        matched = counts[candidates]
+        missing = snapshot.sizes[candidates] - matched
+        order = np.lexsort((-recipe_ids, -matched, missing))
+        return recipe_ids[order], matched[order], missing[order]
+
+
+pantry_index = PantryIndex()
@@ -0,0 +1,133 @@
+import hashlib
+import string
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+from foodgram_backend import metrics
+from .models import Recipe
+
+
+ALPHABET = string.ascii_letters + string.digits
+
+CODE_LENGTH = 7
+
+CODE_BITS = 40
+
+MASK = (1 << CODE_BITS) - 1
+
+EXISTS_CACHE_KEY = 'recipe-exists:{}'
+
+
+@lru_cache(maxsize=None)
+def _keys(secret_key):
+    digest = hashlib.sha256(f'short-link:{secret_key}'.encode()).digest()
+    multiplier = int.from_bytes(digest[:5], 'big') | 1
+    return multiplier, pow(multiplier, -1, 1 << CODE_BITS), int.from_bytes(
+        digest[5:10], 'big'
+    )
+
+
+def encode_short_code(pk):
+    if pk > MASK:
+        return str(pk)
+    multiplier, _, offset = _keys(settings.SECRET_KEY)
+    value = (pk * multiplier + offset) & MASK
+    value ^= value >> (CODE_BITS // 2)
+    value = (value * multiplier) & MASK
+    code = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        code.append(ALPHABET[digit])
+    # Старший разряд 40-битного значения не превышает 19, поэтому код всегда
+    # начинается с буквы и не путается с числовыми ссылками /s/<pk>/.
+    return ''.join(reversed(code))
+
+
+def decode_short_code(code):
+    if code.isdigit():
+        return int(code)
+    if len(code) != CODE_LENGTH or any(char not in ALPHABET for char in code):
+        return None
+    value = 0
+    for char in code:
+        value = value * len(ALPHABET) + ALPHABET.index(char)
+    if value > MASK:
+        return None
+    _, inverse, offset = _keys(settings.SECRET_KEY)
+    value = (value * inverse) & MASK
+    value ^= value >> (CODE_BITS // 2)
+    return ((value - offset) * inverse) & MASK or None
+
+
+class LiveRecipeIds:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bits = bytearray()
+        self.built_at = None
+
+    def refresh(self):
+        bits, count = bytearray(), 0
+        for pk in Recipe.objects.order_by('pk').values_list('pk', flat=True):
+            if pk >> 3 >= len(bits):
+                bits.extend(bytes((pk >> 3) - len(bits) + 4096))
+            bits[pk >> 3] |= 1 << (pk & 7)
+            count += 1
+        with self.lock:
+            self.bits, self.built_at = bits, time.monotonic()
+        return count
+
+    def _ensure_fresh(self):
+        if (
+            self.built_at is None
+            or time.monotonic() - self.built_at
+            > settings.SHORT_LINK_REFRESH_SECONDS
+        ):
+            self.refresh()
+
+    def __contains__(self, pk):
+        self._ensure_fresh()
+        bits = self.bits
+        return pk >> 3 < len(bits) and bool(bits[pk >> 3] & 1 << (pk & 7))
+
+    def add(self, pk):
+        with self.lock:
+            if pk >> 3 >= len(self.bits):
+                self.bits.extend(bytes((pk >> 3) - len(self.bits) + 4096))
+            self.bits[pk >> 3] |= 1 << (pk & 7)
+
+    def discard(self, pk):
+        with self.lock:
+            if pk >> 3 < len(self.bits):
+                self.bits[pk >> 3] &= ~(1 << (pk & 7)) & 0xFF
+
+
+live_recipe_ids = LiveRecipeIds()
+
+
+def recipe_exists(pk):
+    if pk in live_recipe_ids:
+        metrics.record_cache('short_links', hit=True)
+        return True
+    metrics.record_cache('short_links', hit=False)
+    key = EXISTS_CACHE_KEY.format(pk)
+    exists = cache.get(key)
+    if exists is None:
+        exists = Recipe.objects.filter(pk=pk).exists()
+        cache.set(key, exists, settings.SHORT_LINK_CACHE_TIMEOUT)
+    if exists:
+        live_recipe_ids.add(pk)
+    return exists
+
+
+def mark_recipe_created(pk):
+    live_recipe_ids.add(pk)
+    cache.delete(EXISTS_CACHE_KEY.format(pk))
+
+
+def mark_recipe_deleted(pk):
+    live_recipe_ids.discard(pk)
+    cache.delete(EXISTS_CACHE_KEY.format(pk))
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from . import tasks
+from .changes import record_recipe_deletion
+from .catalog import mark_ingredient_deleted
+from .feed import crossed_fan_out_threshold, followers_count
+from .models import Ingredient, Recipe, SimilarRecipe, Subscribe
+from .pantry import pantry_index
+from .shortlinks import mark_recipe_created, mark_recipe_deleted
+from tasks.queue import enqueue
+
+
+def _refresh_similar_recipes():
+    # Пересчёт инкрементальный, поэтому правки за несколько секунд
+    # собираются в один запуск.
+    enqueue(
+        tasks.refresh_similar_recipes, unique=True,
+        delay=settings.SIMILAR_RECIPES_DELAY
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    if created:
+        mark_recipe_created(instance.pk)
+        enqueue(tasks.fan_out, recipe_id=instance.pk)
+    _refresh_similar_recipes()
+    transaction.on_commit(pantry_index.invalidate)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    # Строки соседства удалятся каскадом, поэтому рецепты, у которых
+    # удаляемый был соседом, запоминаются заранее.
+    instance._similar_of = list(SimilarRecipe.objects.filter(
+        similar_id=instance.pk
+    ).values_list('recipe_id', flat=True))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    mark_recipe_deleted(instance.pk)
+    record_recipe_deletion(instance.pk)
+    if instance._similar_of:
+        enqueue(
+            tasks.recompute_similar_recipes,
+            delay=settings.SIMILAR_RECIPES_DELAY,
+            recipe_ids=instance._similar_of
+        )
+    else:
+        _refresh_similar_recipes()
+    transaction.on_commit(pantry_index.invalidate)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_relations_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        transaction.on_commit(pantry_index.invalidate)
+
+
+@receiver(post_save, sender=Subscribe)
+def subscription_created(sender, instance, created, **kwargs):
+    if created:
+        enqueue(
+            tasks.backfill,
+            user_id=instance.user_id, author_id=instance.subscribing_id
+        )
+
+
+@receiver(pre_delete, sender=Subscribe)
+def subscription_deleting(sender, instance, **kwargs):
+    # При массовом удалении все pre_delete приходят до удаления строк,
+    # а все post_delete — после, поэтому переход через порог виден.
+    instance._followers_before = followers_count(instance.subscribing_id)
+
+
+@receiver(post_delete, sender=Subscribe)
+def subscription_deleted(sender, instance, **kwargs):
+    enqueue(
+        tasks.prune,
+        user_id=instance.user_id, author_id=instance.subscribing_id
+    )
+    if crossed_fan_out_threshold(
+        instance._followers_before,
+        followers_count(instance.subscribing_id)
+    ):
+        enqueue(
+            tasks.backfill_author, unique=True,
+            author_id=instance.subscribing_id
+        )
+
+
+@receiver(post_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    mark_ingredient_deleted(instance.pk)
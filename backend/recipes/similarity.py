@@ -0,0 +1,141 @@
+from itertools import chain
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Recipe, RecipeIngredients, SimilarRecipe
+
+
+class IngredientMatrix:
+    def __init__(self):
+        pairs = np.fromiter(
+            chain.from_iterable(
+                RecipeIngredients.objects.order_by().values_list(
+                    'recipe_id', 'ingredient_id'
+                ).iterator()
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        self.recipe_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+        self.ingredient_ids, columns = np.unique(
+            pairs[:, 1], return_inverse=True
+        )
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(len(self.recipe_ids), columns.max(initial=-1) + 1),
+        )
+        self.matrix.sum_duplicates()
+        self.matrix.data[:] = 1
+        self.transposed = self.matrix.T.tocsr()
+        self.sizes = np.asarray(self.matrix.sum(axis=1)).ravel()
+
+    def rows(self, recipe_ids):
+        recipe_ids = np.asarray(list(recipe_ids), dtype=np.int64)
+        positions = np.searchsorted(self.recipe_ids, recipe_ids)
+        found = positions < len(self.recipe_ids)
+        found[found] = self.recipe_ids[positions[found]] == recipe_ids[found]
+        return positions[found]
+
+    def jaccard(self, rows):
+        # Пересечения для целого блока рецептов считаются одним умножением
+        # разреженных матриц, коэффициент Жаккара — векторно по строке.
+        overlap = (self.matrix[rows] @ self.transposed).tocsr()
+        for index, row in enumerate(rows):
+            start, end = overlap.indptr[index], overlap.indptr[index + 1]
+            columns = overlap.indices[start:end]
+            intersection = overlap.data[start:end]
+            scores = intersection / (
+                self.sizes[row] + self.sizes[columns] - intersection
+            )
+            scores[columns == row] = 0
+            yield row, columns, scores
+
+
+def _top(columns, scores, top):
+    best = (
+        np.argpartition(-scores, top)[:top] if len(scores) > top
+        else np.arange(len(scores))
+    )
+    best = best[scores[best] > 0]
+    best = best[np.argsort(-scores[best], kind='stable')]
+    return columns[best], scores[best]
+
+
+def _blocks(rows, block_size):
+    for start in range(0, len(rows), block_size):
+        yield rows[start:start + block_size]
+
+
+def _affected_rows(matrix, changed_rows, last_run, top, block_size):
+    # Соседи неизменённого рецепта меняются, только если изменённый рецепт
+    # уже был среди них или теперь обходит последнего из них по сходству.
+    min_scores = np.zeros(len(matrix.recipe_ids))
+    counts = np.zeros(len(matrix.recipe_ids), dtype=np.int64)
+    stats = list(
+        SimilarRecipe.objects.order_by().values('recipe_id').annotate(
+            min_score=Min('score'), count=Count('pk')
+        ).values_list('recipe_id', 'min_score', 'count')
+    )
+    if stats:
+        recipe_ids, scores, neighbours = zip(*stats)
+        rows = matrix.rows(recipe_ids)
+        known = np.isin(recipe_ids, matrix.recipe_ids)
+        min_scores[rows] = np.asarray(scores)[known]
+        counts[rows] = np.asarray(neighbours)[known]
+    affected = set(changed_rows.tolist())
+    affected.update(matrix.rows(
+        SimilarRecipe.objects.filter(
+            similar__updated_at__gte=last_run
+        ).values_list('recipe_id', flat=True)
+    ).tolist())
+    for block in _blocks(changed_rows, block_size):
+        for _, columns, scores in matrix.jaccard(block):
+            affected.update(columns[(scores > 0) & (
+                (counts[columns] < top) | (scores > min_scores[columns])
+            )].tolist())
+    return np.array(sorted(affected), dtype=np.int64)
+
+
+def update_similar_recipes(full=False, top=10, block_size=500, recipe_ids=()):
+    computed_at = timezone.now()
+    last_run = SimilarRecipe.objects.aggregate(
+        Max('computed_at')
+    )['computed_at__max']
+    matrix = IngredientMatrix()
+    if full or last_run is None:
+        SimilarRecipe.objects.all().delete()
+        rows = np.arange(len(matrix.recipe_ids))
+    else:
+        changed_rows = matrix.rows(Recipe.objects.filter(
+            updated_at__gte=last_run
+        ).values_list('pk', flat=True))
+        # recipe_ids — рецепты, потерявшие соседа при его удалении: сами
+        # они не менялись, и по updated_at их не найти.
+        rows = np.union1d(
+            _affected_rows(matrix, changed_rows, last_run, top, block_size),
+            matrix.rows(recipe_ids)
+        )
+        SimilarRecipe.objects.filter(
+            recipe__updated_at__gte=last_run
+        ).delete()
+    for block in _blocks(rows, block_size):
+        similar_recipes = []
+        for row, columns, scores in matrix.jaccard(block):
+            columns, scores = _top(columns, scores, top)
+            similar_recipes.extend(
+                SimilarRecipe(
+                    recipe_id=int(matrix.recipe_ids[row]),
+                    similar_id=int(matrix.recipe_ids[column]),
+                    score=float(score),
+                    computed_at=computed_at,
+                ) for column, score in zip(columns, scores)
+            )
+        with transaction.atomic():
+            SimilarRecipe.objects.filter(
+                recipe_id__in=matrix.recipe_ids[block].tolist()
+            ).delete()
+            SimilarRecipe.objects.bulk_create(similar_recipes)
+    return len(rows)
@@ -0,0 +1,38 @@
+from .feed import (
+    backfill_feed, backfill_followers, fan_out_recipe, prune_feed
+)
+from .models import Recipe
+from .similarity import update_similar_recipes
+from tasks.queue import task
+
+
+@task(priority=10)
+def fan_out(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is not None:
+        fan_out_recipe(recipe)
+
+
+@task(priority=10)
+def backfill(user_id, author_id):
+    backfill_feed(user_id, author_id)
+
+
+@task(priority=10)
+def backfill_author(author_id):
+    backfill_followers(author_id)
+
+
+@task(priority=10)
+def prune(user_id, author_id):
+    prune_feed(user_id, author_id)
+
+
+@task(max_attempts=1)
+def refresh_similar_recipes():
+    update_similar_recipes()
+
+
+@task(max_attempts=1)
+def recompute_similar_recipes(recipe_ids):
+    update_similar_recipes(recipe_ids=recipe_ids)
@@ -4,5 +4,5 @@ from .views import recipe_redirect
 
 
 urlpatterns = [
-    path('s/<int:pk>/', recipe_redirect, name='short-link')
+    path('s/<str:code>/', recipe_redirect, name='short-link')
 ]
@@ -1,13 +1,14 @@
 from django.http import Http404
 from django.shortcuts import redirect
 
-from recipes.models import Recipe
+from .shortlinks import decode_short_code, recipe_exists
 
 
-RECIPE_NOT_FOUND = 'Рецепт с id = {} не найден.'
+RECIPE_NOT_FOUND = 'Рецепт {} не найден.'
 
 
-def recipe_redirect(request, pk):
-    if Recipe.objects.filter(pk=pk).exists():
-        return redirect(f'/recipes/{pk}')
-    return Http404(RECIPE_NOT_FOUND.format(pk))
+def recipe_redirect(request, code):
+    pk = decode_short_code(code)
+    if pk is None or not recipe_exists(pk):
+        raise Http404(RECIPE_NOT_FOUND.format(code))
+    return redirect(f'/recipes/{pk}')
@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'name', 'status', 'priority', 'attempts', 'run_after', 'created_at'
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'error')
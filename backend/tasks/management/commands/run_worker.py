@@ -0,0 +1,51 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management import base
+from django.db import close_old_connections
+
+from tasks.queue import claim, requeue_stale, run
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Воркер фоновых задач: забирает задачи из таблицы через '
+        'SELECT ... FOR UPDATE SKIP LOCKED и выполняет их.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        processed = 0
+        while not self.stopping:
+            # Как и между HTTP-запросами: соединение закрывается по
+            # CONN_MAX_AGE или если оно оборвалось.
+            close_old_connections()
+            requeue_stale()
+            claimed = claim()
+            if claimed is None:
+                if options['burst']:
+                    break
+                time.sleep(settings.TASKS_POLL_INTERVAL)
+                continue
+            started = time.monotonic()
+            result = run(claimed)
+            processed += 1
+            self.stdout.write(
+                f'{claimed.name}: {result} за '
+                f'{(time.monotonic() - started) * 1000:.0f} мс'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Воркер остановлен, выполнено задач: {processed}'
+        ))
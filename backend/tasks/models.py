@@ -0,0 +1,53 @@
+from django.db import models
+from django.utils import timezone
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FAILED = 'failed'
+
+STATUSES = (
+    (QUEUED, 'В очереди'),
+    (RUNNING, 'Выполняется'),
+    (FAILED, 'Ошибка'),
+)
+
+
+class Task(models.Model):
+    name = models.CharField(max_length=200, verbose_name='Задача')
+    kwargs = models.JSONField(default=dict, verbose_name='Аргументы')
+    priority = models.SmallIntegerField(default=0, verbose_name='Приоритет')
+    status = models.CharField(
+        max_length=16, choices=STATUSES, default=QUEUED,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3, verbose_name='Максимум попыток'
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now, verbose_name='Не раньше'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Создана'
+    )
+    started_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Начата'
+    )
+    error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        ordering = ('-priority', 'run_after', 'id')
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_after'],
+                name='task_dequeue_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
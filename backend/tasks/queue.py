@@ -0,0 +1,118 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from foodgram_backend import metrics
+from .models import FAILED, QUEUED, RUNNING, Task
+
+
+logger = logging.getLogger('foodgram.tasks')
+
+UNKNOWN_TASK = 'Неизвестная задача: {}'
+
+TASK_TIMED_OUT = (
+    'Задача не завершилась за TASKS_TIMEOUT и исчерпала попытки: '
+    'вероятно, она роняет воркер.'
+)
+
+registry = {}
+
+
+def task(priority=0, max_attempts=3):
+    def register(func):
+        func.task_name = f'{func.__module__}.{func.__name__}'
+        func.priority = priority
+        func.max_attempts = max_attempts
+        registry[func.task_name] = func
+        return func
+    return register
+
+
+def enqueue(func, delay=0, unique=False, priority=None, **kwargs):
+    # Задача пишется в ту же транзакцию, что и изменения, которые её
+    # вызвали: воркер увидит её только после коммита.
+    if settings.TASKS_EAGER:
+        return func(**kwargs)
+    if unique and Task.objects.filter(
+        name=func.task_name, kwargs=kwargs, status=QUEUED
+    ).exists():
+        return None
+    Task.objects.create(
+        name=func.task_name,
+        kwargs=kwargs,
+        priority=func.priority if priority is None else priority,
+        max_attempts=func.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    metrics.inc('foodgram_tasks_total', task=func.task_name, result='queued')
+    return None
+
+
+def requeue_stale():
+    # Задача, уронившая воркер, так и остаётся RUNNING: после TASKS_TIMEOUT
+    # она возвращается в очередь, пока не исчерпает попытки.
+    stale = Task.objects.filter(
+        status=RUNNING,
+        started_at__lt=timezone.now() - timedelta(
+            seconds=settings.TASKS_TIMEOUT
+        ),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=FAILED, error=TASK_TIMED_OUT
+    )
+    if failed:
+        logger.error('Зависших задач без попыток: %s', failed)
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status=QUEUED
+    )
+
+
+def claim():
+    with transaction.atomic():
+        claimed = Task.objects.select_for_update(skip_locked=True).filter(
+            status=QUEUED, run_after__lte=timezone.now()
+        ).order_by('-priority', 'run_after', 'id').first()
+        if claimed is None:
+            return None
+        claimed.status = RUNNING
+        claimed.attempts += 1
+        claimed.started_at = timezone.now()
+        claimed.save(update_fields=['status', 'attempts', 'started_at'])
+    return claimed
+
+
+def _retry_delay(attempts):
+    return settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def run(claimed):
+    func = registry.get(claimed.name)
+    try:
+        if func is None:
+            raise LookupError(UNKNOWN_TASK.format(claimed.name))
+        with transaction.atomic():
+            func(**claimed.kwargs)
+    except Exception:
+        logger.exception('Задача %s упала', claimed.name)
+        claimed.error = traceback.format_exc()
+        if func is not None and claimed.attempts < claimed.max_attempts:
+            claimed.status = QUEUED
+            claimed.run_after = timezone.now() + timedelta(
+                seconds=_retry_delay(claimed.attempts)
+            )
+            result = 'retried'
+        else:
+            claimed.status = FAILED
+            result = 'failed'
+        claimed.save(update_fields=['status', 'run_after', 'error'])
+    else:
+        # Выполненные задачи не храним, упавшие остаются для разбора.
+        claimed.delete()
+        result = 'done'
+    metrics.inc('foodgram_tasks_total', task=claimed.name, result=result)
+    return result